@@ -1,30 +1,153 @@
 # app/graph/assistant.py
 
-import json
+import time
+
+# Cold-start timing includes the imports below (tools, RAG, LangChain)
+_t0 = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import AsyncExitStack, ExitStack
+from typing import Callable, Optional, Sequence
+
 from langchain_core.messages import SystemMessage
 from langchain_core.runnables.config import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.redis import RedisSaver
-from langgraph.store.postgres import PostgresStore
 from langgraph.store.base import BaseStore
-from langgraph.prebuilt import ToolNode
 
-from app.config import REDIS_URI, POSTGRES_URI
+from app.config import REDIS_URI, POSTGRES_URI, MEMORY_WRITE_MODE, PROMPT_LAYOUT
+from app.config import SUMMARY_MODE
 from app.config import get_llm
 from app.graph.state import ChatState
-from app.graph.memory.short_term_memory import summarize_node
+from app.graph.memory.short_term_memory import (
+    asummarize_node,
+    needs_summary,
+    summarize_node,
+)
 from app.schemas.profile_schema import UpdateProfileMemory
 from app.schemas.instructions_schema import UpdateInstructionMemory
 from app.schemas.project_schema import UpdateProjectMemory
-from app.graph.prompts import SYSTEM_PROMPT
-from app.graph.memory import MEMORY
+from app.graph.prompts import CONTEXT_PROMPT, STATIC_SYSTEM_PROMPT, SYSTEM_PROMPT
+from app.graph.memory import MEMORY, AMEMORY
+from app.graph.memory.cache import memory_cache
+from app.graph.memory.loader import load_memories, aload_memories
+from app.graph.memory.job_queue import memory_queue
+from app.graph.memory.summary_jobs import BackgroundSummarizer
+from app.graph.context import AssembledContext, assembler
+from app.graph.dispatch import last_user_text
+from app.graph.tokens import count_message_tokens
+from app.graph.tool_registry import ToolRegistry
+from app.graph.dispatch import ToolDispatcher
+from app.graph.setup import mark_setup_done, setup_needed
+from app.graph.postgres import apostgres_store, postgres_store
+from app.graph.checkpoint_serde import redis_saver_class
+from app.graph.retention import checkpoint_ttl
 from app.tools import TOOLS
-from app.mcp import MCP
 from app.rag import RAG
+from app.metrics import metrics, startup
+from app.mcp import aget_mcp_tools, get_mcp_tools
 
+logger = logging.getLogger(__name__)
 
 model = get_llm()
 
+# Bound model, tool schemas and routing map, built once
+registry = ToolRegistry(
+    model,
+    tools=[*RAG, *TOOLS],
+    mcp_tools=get_mcp_tools,
+    memory_schemas=[
+        UpdateProfileMemory,
+        UpdateProjectMemory,
+        UpdateInstructionMemory,
+    ],
+)
+
+# Runs every tool call of a turn concurrently (memory calls included). In
+# background mode memory calls are only queued for the memory worker.
+if MEMORY_WRITE_MODE == "background":
+    dispatcher = ToolDispatcher(registry, *memory_queue.handlers(MEMORY))
+else:
+    dispatcher = ToolDispatcher(registry, MEMORY, AMEMORY)
+
+
+# Built once so the leading message is the same object (and bytes) every turn
+_STATIC_MESSAGE = SystemMessage(content=STATIC_SYSTEM_PROMPT)
+
+
+def _summary_messages(state: ChatState) -> list:
+    if not state.get("summary"):
+        return []
+    return [
+        SystemMessage(
+            content=f"Previous conversation (summarized):\n{state.get('summary')}"
+        )
+    ]
+
+
+def _system_messages(state: ChatState, context: AssembledContext) -> list:
+    # Format prompt
+    prompt = SYSTEM_PROMPT.format(**context.prompt_vars())
+
+    # Build the system message with prompt ans summarized history
+    return [SystemMessage(content=prompt), *_summary_messages(state)]
+
+
+def _prompt(state: ChatState, memories: dict) -> tuple[list, AssembledContext]:
+    """
+    System messages (memories fitted to their token budgets) + history.
+
+    In the "stable" layout the messages are ordered from least to most
+    volatile: the static prompt (shared by every user and turn), the thread
+    summary (changes only when the thread is summarized), the history
+    (append-only) and finally the user's memories, which may change on any
+    turn. Everything up to the previous turn's memories is then a prefix
+    OpenAI can serve from its prompt cache.
+    """
+    context = assembler.assemble(memories, query=last_user_text(state["messages"]))
+    if PROMPT_LAYOUT == "legacy":
+        return _system_messages(state, context) + state["messages"], context
+    return [
+        _STATIC_MESSAGE,
+        *_summary_messages(state),
+        *state["messages"],
+        SystemMessage(content=CONTEXT_PROMPT.format(**context.prompt_vars())),
+    ], context
+
+
+def _report(uid: str, prompt: list, context: AssembledContext, ai_msg) -> None:
+    """
+    Record the prompt size of this turn (estimated and as billed) and how
+    much of it OpenAI served from its prompt cache.
+    """
+    estimated = count_message_tokens(prompt)
+    usage = getattr(ai_msg, "usage_metadata", None) or {}
+    billed = usage.get("input_tokens")
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    metrics.observe("prompt.tokens", billed or estimated)
+    metrics.observe("prompt.context_tokens", context.tokens)
+    # Memory context that didn't fit the budget and was left out of the prompt
+    metrics.incr("prompt.context_tokens_dropped", context.dropped_tokens)
+    if billed:
+        metrics.observe("prompt.cached_tokens", cached)
+        metrics.incr("prompt.input_tokens_total", billed)
+        metrics.incr("prompt.cached_tokens_total", cached)
+    logger.info(
+        "Prompt for %r: %s tokens (%d cached, estimated %d), "
+        "memory context %d of %d tokens (%s)",
+        uid,
+        billed if billed is not None else "?",
+        cached,
+        estimated,
+        context.tokens,
+        context.available_tokens,
+        ", ".join(
+            f"{name} {s.kept}/{s.total}" for name, s in context.sections.items()
+        ),
+    )
+
 
 # Main Agent node
 def assistant_node(
@@ -33,55 +156,28 @@ def assistant_node(
     store: BaseStore,
 ):
     """
-    1) Gather long-term profile from store
-    2) Issue the SYSTEM_PROMPT + history to the LLM
-    3) Bind the three memory tools, disallow parallel calls
-    4) Return the AI's reply (which may include exactly one tool_call)
+    1) Gather long-term memories from the memory cache (store on a miss)
+    2) Fit them to the per-section token budgets of SYSTEM_PROMPT
+    3) Issue the SYSTEM_PROMPT + history to the registry's pre-bound model
+       (all tools, parallel calls allowed) and record the prompt size
+    4) Return the AI's reply (which may include several tool_calls)
     """
     uid = config["configurable"]["user_id"]
 
-    # Load Long-term memories
-    prof_entry = store.get(("profile", uid), "user_profile")
-    profile = prof_entry.value if prof_entry and prof_entry.value else {}
+    # Load Long-term memories (cached until a memory node updates them)
+    memories = memory_cache.get(uid)
+    if memories is None:
+        generation = memory_cache.generation(uid)
+        memories = load_memories(store, uid)
+        memory_cache.set(uid, memories, generation)
 
-    inst_entries = store.search(("instructions", uid))
-    instructions = [i.value for i in inst_entries]
-
-    proj_entries = store.search(("projects", uid))
-    projects = [p.value for p in proj_entries]
-
-    # Format prompt
-    prompt = SYSTEM_PROMPT.format(
-        profile=json.dumps(profile, indent=2),
-        instructions=json.dumps(instructions, indent=2),
-        projects=json.dumps(projects, indent=2),
-    )
-
-    # Build the system message with prompt ans summarized history
-    system_messages = [SystemMessage(content=prompt)]
-
-    if state.get("summary"):
-        system_messages.append(
-            SystemMessage(
-                content=f"Previous conversation (summarized):\n{state.get('summary')}"
-            )
-        )
-
-    # Give the tools to the Agent
-    assistant = model.bind_tools(
-        [
-            *RAG,
-            *TOOLS,
-            *MCP,
-            UpdateProfileMemory,
-            UpdateProjectMemory,
-            UpdateInstructionMemory,
-        ],
-        parallel_tool_calls=False,
-    )
+    # The tools are already bound by the registry (rebuilt only if MCP changed)
+    registry.refresh()
 
     # Invoke the Agent with the system message and recent messages
-    ai_msg = assistant.invoke(system_messages + state["messages"])
+    prompt, context = _prompt(state, memories)
+    ai_msg = registry.bound_model.invoke(prompt)
+    _report(uid, prompt, context, ai_msg)
 
     msg = ai_msg.model_dump(mode="json")
 
@@ -91,84 +187,241 @@ def assistant_node(
     return {"messages": [msg]}
 
 
+async def aassistant_node(
+    state: ChatState,
+    config: RunnableConfig,
+    store: BaseStore,
+):
+    """Async version of `assistant_node`."""
+    uid = config["configurable"]["user_id"]
+
+    memories = await memory_cache.aget(uid)
+    if memories is None:
+        generation = await memory_cache.ageneration(uid)
+        memories = await aload_memories(store, uid)
+        await memory_cache.aset(uid, memories, generation)
+
+    registry.refresh()
+    prompt, context = _prompt(state, memories)
+    ai_msg = await registry.bound_model.ainvoke(prompt)
+    _report(uid, prompt, context, ai_msg)
+    return {"messages": [ai_msg.model_dump(mode="json")]}
+
+
+# Background summarization: hand the finished turn to the graph's summarizer
+def _after_turn(summarizer: BackgroundSummarizer, async_mode: bool):
+    def after_turn_node(state: ChatState, config: RunnableConfig):
+        if needs_summary(state["messages"]):
+            summarizer.schedule(config)
+        return {}
+
+    async def aafter_turn_node(state: ChatState, config: RunnableConfig):
+        """Async version of `after_turn_node`."""
+        if needs_summary(state["messages"]):
+            summarizer.aschedule(config)
+        return {}
+
+    return aafter_turn_node if async_mode else after_turn_node
+
+
 # Routing
 def route_summarize(state, *_):
-    return "summarize_conversation" if len(state["messages"]) > 10 else "assistant"
+    # Token-based window: summarize above HISTORY_HIGH_WATER_TOKENS
+    return "summarize_conversation" if needs_summary(state["messages"]) else "assistant"
 
 def route_tools(state, *_):
     last = state["messages"][-1]
     calls = getattr(last, "tool_calls", []) or []
-    if not calls:
-        return END
-
-    name = calls[0]["name"]
-    if name in [t.name for t in RAG + TOOLS + MCP]:
-        return name
-    if name == "UpdateProfileMemory":
-        return "update_user_profile"
-    if name == "UpdateInstructionMemory":
-        return "update_instructions"
-    if name == "UpdateProjectMemory":
-        return "update_projects"
-    return END
+    return "tools" if calls else END
 
 
 # Build the StateGraph
-builder = StateGraph(ChatState)
-
-# Core chatbot
-builder.add_node("assistant", assistant_node)
-builder.add_node("summarize_conversation", summarize_node)
-
-# ToolNodes for every tool in TOOLS and RAG
-for tool_fn in RAG:
-    node_name = tool_fn.name
-    builder.add_node(node_name, ToolNode([tool_fn]))
-for tool_fn in TOOLS:
-    node_name = tool_fn.name
-    builder.add_node(node_name, ToolNode([tool_fn]))
-for tool_fn in MCP:
-    node_name = tool_fn.name
-    builder.add_node(node_name, ToolNode([tool_fn]))
-
-# Memory update nodes
-for tool_fn in MEMORY:
-    node_name = tool_fn.__name__
-    builder.add_node(node_name, tool_fn)
-
-# Edges
-builder.add_conditional_edges(START, route_summarize)
-builder.add_edge("summarize_conversation", "assistant")
-
-builder.add_conditional_edges("assistant", route_tools)
-for node_name in [
-    *[t.name for t in RAG],
-    *[t.name for t in TOOLS],
-    *[t.name for t in MCP],
-    "update_user_profile",
-    "update_instructions",
-    "update_projects",
-]:
-    builder.add_edge(node_name, "assistant")
-
-# Redis checkpointer
-_raw_redis = RedisSaver.from_conn_string(REDIS_URI)
-redis_cp = _raw_redis.__enter__()
-redis_cp.setup()
-
-# Postgres store
-_raw_pg = PostgresStore.from_conn_string(POSTGRES_URI)
-pg_store = _raw_pg.__enter__()
-pg_store.setup()
-
-
-GRAPH = builder.compile(
-    checkpointer=redis_cp,
-    store=pg_store,
-)
+def _build(
+    async_mode: bool = False, summarizer: Optional[BackgroundSummarizer] = None
+) -> StateGraph:
+    """
+    Graph wiring, with either the sync or the async node implementations.
+    `summarizer` receives the turns to summarize in background SUMMARY_MODE
+    (attach it to the compiled graph).
+    """
+    builder = StateGraph(ChatState)
+
+    # Core chatbot
+    builder.add_node("assistant", aassistant_node if async_mode else assistant_node)
+    builder.add_node(
+        "summarize_conversation", asummarize_node if async_mode else summarize_node
+    )
+
+    # One dispatcher node for every tool call the model emits
+    builder.add_node(
+        "tools", dispatcher.adispatch if async_mode else dispatcher.dispatch
+    )
+
+    # Edges
+    if SUMMARY_MODE == "background":
+        # Reply first; the summary is written to the checkpoint afterwards
+        # (attributed to summarize_conversation, which nothing routes to)
+        summarizer = summarizer or BackgroundSummarizer()
+        builder.add_node("after_turn", _after_turn(summarizer, async_mode))
+        builder.add_edge(START, "assistant")
+        builder.add_conditional_edges(
+            "assistant", route_tools, {"tools": "tools", END: "after_turn"}
+        )
+        builder.add_edge("after_turn", END)
+        builder.add_edge("summarize_conversation", END)
+    else:
+        builder.add_conditional_edges(START, route_summarize)
+        builder.add_edge("summarize_conversation", "assistant")
+        builder.add_conditional_edges("assistant", route_tools)
+
+    builder.add_edge("tools", "assistant")
+
+    return builder
+
+
+# Connections opened by the factories, kept for the life of the process
+_resources = ExitStack()
+_aresources = AsyncExitStack()
+
+
+def build_graph(
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    store: Optional[BaseStore] = None,
+    mcp_tools: Optional[Callable[[], Sequence[BaseTool]]] = None,
+    setup: Optional[str] = None,
+):
+    """
+    Compile the sync graph.
+
+    The checkpointer and store default to a RedisSaver (CHECKPOINT_MODE,
+    TTL and compression: see app.graph.retention and
+    app.graph.checkpoint_serde) and a pooled
+    PostgresStore (see app.graph.postgres) opened here; pass your own (e.g.
+    InMemorySaver / InMemoryStore) to skip them. `mcp_tools` replaces where
+    the (process-wide) tool registry gets its MCP tools from, e.g.
+    `lambda: []` to never spawn the MCP servers; by default they are
+    connected on the first turn. Store migrations follow
+    `setup` / GRAPH_SETUP (see app.graph.setup).
+    """
+    if mcp_tools is not None:
+        registry.set_mcp_source(mcp_tools)
+
+    if checkpointer is None:
+        with startup.phase("redis_connect"):
+            checkpointer = _resources.enter_context(
+                redis_saver_class().from_conn_string(REDIS_URI, ttl=checkpoint_ttl())
+            )
+        with startup.phase("redis_setup"):
+            checkpointer.setup()
+
+    migrated = False
+    if store is None:
+        with startup.phase("postgres_connect"):
+            store = _resources.enter_context(postgres_store(POSTGRES_URI))
+        if setup_needed(setup):
+            with startup.phase("postgres_setup"):
+                store.setup()
+            migrated = True
+
+    with startup.phase("compile"):
+        summarizer = BackgroundSummarizer()
+        graph = _build(summarizer=summarizer).compile(
+            checkpointer=checkpointer, store=store
+        )
+    summarizer.attach(graph)
+    if migrated:
+        mark_setup_done()
+
+    logger.info("Graph ready: %s", startup.report())
+    return graph
+
+
+async def abuild_graph(
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    store: Optional[BaseStore] = None,
+    mcp_tools: Optional[Callable[[], Sequence[BaseTool]]] = None,
+    setup: Optional[str] = None,
+):
+    """
+    Async version of `build_graph`: async nodes, AsyncRedisSaver and a
+    pooled AsyncPostgresStore (opened in the running event loop). Unless
+    `mcp_tools` is given, the MCP servers are connected here, in the same
+    loop, because the sync fallback can't run inside a running loop.
+    """
+    if mcp_tools is not None:
+        registry.set_mcp_source(mcp_tools)
+    else:
+        await aget_mcp_tools()
+
+    if checkpointer is None:
+        with startup.phase("redis_connect"):
+            checkpointer = await _aresources.enter_async_context(
+                redis_saver_class(async_mode=True).from_conn_string(
+                    REDIS_URI, ttl=checkpoint_ttl()
+                )
+            )
+        with startup.phase("redis_setup"):
+            await checkpointer.asetup()
+
+    migrated = False
+    if store is None:
+        with startup.phase("postgres_connect"):
+            store = await _aresources.enter_async_context(
+                apostgres_store(POSTGRES_URI)
+            )
+        if await asyncio.to_thread(setup_needed, setup):
+            with startup.phase("postgres_setup"):
+                await store.setup()
+            migrated = True
+
+    with startup.phase("compile"):
+        summarizer = BackgroundSummarizer()
+        graph = _build(True, summarizer).compile(checkpointer=checkpointer, store=store)
+    summarizer.attach(graph)
+    if migrated:
+        await asyncio.to_thread(mark_setup_done)
+
+    logger.info("Async graph ready: %s", startup.report())
+    return graph
+
+
+# Async graph served by langgraph-api, built on the first call and kept for
+# the life of the process
+_async_graph = None
+_async_lock = asyncio.Lock()
+
+
+async def make_graph(config: Optional[RunnableConfig] = None):
+    """
+    Graph factory used by langgraph-api (see langgraph.json).
+
+    Every node awaits its LLM, Postgres and Redis calls, so one worker can
+    multiplex many concurrent conversations instead of parking a thread per run.
+    """
+    global _async_graph
+    async with _async_lock:
+        if _async_graph is None:
+            _async_graph = await abuild_graph()
+    return _async_graph
+
+
+# Sync graph for the CLI, built on first access of `GRAPH`
+_graph = None
+
+
+def __getattr__(name: str):
+    global _graph
+    if name == "GRAPH":
+        if _graph is None:
+            _graph = build_graph()
+        return _graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+startup.record("import", time.perf_counter() - _t0)
 
 
 # Visualize your graph
 # with open("chatbot_graph.png", "wb") as f:
-#     f.write(GRAPH.get_graph().draw_mermaid_png())
+#     f.write(build_graph().get_graph().draw_mermaid_png())
 # print("Wrote graph to chatbot_graph.png")
@@ -0,0 +1,146 @@
+# app/graph/blob_store.py
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.messages import ToolMessage
+
+from app.config import (
+    BLOB_STORE_BACKEND,
+    BLOB_STORE_DIR,
+    BLOB_STORE_TTL,
+    REDIS_URI,
+    TOOL_OUTPUT_OFFLOAD_CHARS,
+    TOOL_OUTPUT_PREVIEW_CHARS,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+HANDLE_PREFIX = "blob:sha256:"
+_HANDLE = re.compile(r"blob:sha256:([0-9a-f]{64})")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def handle_digest(handle: str) -> str:
+    """The sha256 of a blob handle; ValueError unless it is a well-formed handle."""
+    match = _HANDLE.fullmatch(handle) if isinstance(handle, str) else None
+    if match is None:
+        raise ValueError(f"Invalid blob handle {handle!r}")
+    return match.group(1)
+
+
+class LocalBlobStore:
+    """
+    Content-addressed blobs on local disk (`<dir>/<2 hex>/<sha256>`).
+
+    Writing the same content twice is a no-op, so identical tool outputs
+    (the same page fetched in several threads) are stored once.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _path(self, handle: str) -> Path:
+        digest = handle_digest(handle)
+        path = (self.root / digest[:2] / digest).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Blob handle {handle!r} resolves outside {self.root}")
+        return path
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        handle = HANDLE_PREFIX + _digest(data)
+        path = self._path(handle)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so readers never see a partial blob
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        path = self._path(handle)
+        try:
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+
+class RedisBlobStore:
+    """Same interface on Redis (shared by all workers), expiring after `ttl` seconds."""
+
+    KEY_PREFIX = "pa:blob:"
+
+    def __init__(self, redis_url: str, ttl: Optional[int] = None):
+        self._redis_url = redis_url
+        self.ttl = ttl
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = _digest(data)
+        key = self.KEY_PREFIX + digest
+        if not self.client.set(key, data, ex=self.ttl or None, nx=True) and self.ttl:
+            self.client.expire(key, self.ttl)  # seen again: keep it alive
+        return HANDLE_PREFIX + digest
+
+    def get(self, handle: str) -> Optional[str]:
+        raw = self.client.get(self.KEY_PREFIX + handle_digest(handle))
+        return raw.decode("utf-8") if raw is not None else None
+
+
+def make_blob_store():
+    if BLOB_STORE_BACKEND == "redis":
+        return RedisBlobStore(REDIS_URI, ttl=BLOB_STORE_TTL)
+    return LocalBlobStore(BLOB_STORE_DIR)
+
+
+blob_store = make_blob_store()
+
+
+def offload(message: ToolMessage, threshold: int = TOOL_OUTPUT_OFFLOAD_CHARS) -> ToolMessage:
+    """
+    Replace a tool result over `threshold` characters with a preview and a
+    handle to the full text in the blob store. The model can read the rest
+    with the `read_tool_output` tool; the state, the checkpoints and every
+    later prompt only carry the preview.
+    """
+    content = message.content
+    if not isinstance(content, str) or len(content) <= threshold:
+        return message
+    try:
+        handle = blob_store.put(content)
+    except Exception as e:
+        logger.warning("Could not offload %s output (%s); keeping it inline", message.name, e)
+        return message
+
+    metrics.incr("tool_output.offloaded")
+    metrics.incr("tool_output.offloaded_chars", len(content) - TOOL_OUTPUT_PREVIEW_CHARS)
+    digest = (
+        f"[{message.name} output: {len(content)} chars, stored as {handle}. "
+        f"First {TOOL_OUTPUT_PREVIEW_CHARS} chars below; call "
+        f"read_tool_output(handle, offset, length) for the rest.]\n"
+        + content[:TOOL_OUTPUT_PREVIEW_CHARS]
+    )
+    return message.model_copy(
+        update={"content": digest, "artifact": {"blob": handle, "chars": len(content)}}
+    )
@@ -0,0 +1,244 @@
+# app/graph/checkpoint_serde.py
+
+import base64
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Tuple
+
+import orjson
+from langgraph.checkpoint.redis import RedisSaver
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+from langgraph.checkpoint.redis.ashallow import AsyncShallowRedisSaver
+from langgraph.checkpoint.redis.shallow import ShallowRedisSaver
+
+from app.config import (
+    CHECKPOINT_COMPRESSION,
+    CHECKPOINT_COMPRESSION_LEVEL,
+    CHECKPOINT_COMPRESSION_THRESHOLD,
+    CHECKPOINT_MODE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Set while a saver serializes pending writes (see `compressing`)
+_COMPRESS = ContextVar("compress_checkpoint_blobs", default=False)
+
+# Sole key of a checkpoint's channel_values once they are packed into one blob
+PACKED = "__packed__"
+
+
+# helpers
+def _codec(name: str, level: int):
+    """(compress, decompress) for `name`, or None when its package is missing."""
+    try:
+        if name == "zstd":
+            import zstandard
+
+            compressor = zstandard.ZstdCompressor(level=level)
+            decompressor = zstandard.ZstdDecompressor()
+            return compressor.compress, decompressor.decompress
+        if name == "lz4":
+            import lz4.frame
+
+            return (
+                lambda data: lz4.frame.compress(data, compression_level=level),
+                lz4.frame.decompress,
+            )
+    except ImportError:
+        logger.warning("%s is not installed; checkpoint blobs stay uncompressed", name)
+        return None
+    raise ValueError(f"Unknown checkpoint compression {name!r}")
+
+
+@contextmanager
+def compressing() -> Iterator[None]:
+    """Let `CompressingSerializer.dumps_typed` compress inside this block."""
+    token = _COMPRESS.set(True)
+    try:
+        yield
+    finally:
+        _COMPRESS.reset(token)
+
+
+class CompressingSerializer:
+    """
+    Wrap a checkpoint serializer so payloads over `threshold` bytes are
+    compressed with zstd or lz4.
+
+    The codec is recorded in the type tag ("json" → "json+zstd"), so
+    `loads_typed` decompresses only what was compressed and still reads every
+    checkpoint written before compression was turned on (and with any other
+    codec). `dumps_typed` only compresses inside `compressing()`: the Redis
+    savers keep checkpoints and metadata as RedisJSON documents, so only the
+    opaque pending-write blobs may be. The channel values inside a checkpoint
+    document (the conversation itself) are packed separately by
+    `pack_values`. Everything else is delegated to the wrapped serializer.
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        codec: str = "zstd",
+        threshold: int = 1024,
+        level: int = 3,
+    ):
+        self.inner = inner
+        self.codec = codec
+        self.threshold = threshold
+        self._compress = (_codec(codec, level) or (None, None))[0]
+        self._decompressors: dict = {}
+
+    def _decompress(self, codec: str, data: bytes) -> bytes:
+        if codec not in self._decompressors:
+            funcs = _codec(codec, 0 if codec == "lz4" else 3)
+            if funcs is None:
+                raise RuntimeError(f"{codec} is needed to read this checkpoint")
+            self._decompressors[codec] = funcs[1]
+        return self._decompressors[codec](data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if self._compress is None or not _COMPRESS.get() or len(data) < self.threshold:
+            return type_, data
+        return f"{type_}+{self.codec}", self._compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, blob = data
+        base, _, codec = type_.rpartition("+")
+        if base and codec in ("zstd", "lz4"):
+            type_, blob = base, self._decompress(codec, blob)
+        return self.inner.loads_typed((type_, blob))
+
+    def pack_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        JSON-ready channel values as `{PACKED: "<codec>:<base64>"}` once they
+        reach the threshold. None of these fields are indexed, so the
+        checkpoint document stays searchable.
+        """
+        if self._compress is None or not values:
+            return values
+        data = orjson.dumps(values)
+        if len(data) < self.threshold:
+            return values
+        packed = base64.b64encode(self._compress(data)).decode("ascii")
+        return {PACKED: f"{self.codec}:{packed}"}
+
+    def unpack_values(self, values: Any) -> Any:
+        """`pack_values` reversed; any other value is returned as is."""
+        if not isinstance(values, dict) or set(values) != {PACKED}:
+            return values
+        codec, _, packed = values[PACKED].partition(":")
+        return orjson.loads(self._decompress(codec, base64.b64decode(packed)))
+
+    def __getattr__(self, name: str) -> Any:
+        # The Redis savers also use private helpers of their own serializer
+        return getattr(self.inner, name)
+
+
+def _wrap(saver) -> None:
+    saver.serde = CompressingSerializer(
+        saver.serde,
+        codec=CHECKPOINT_COMPRESSION,
+        threshold=CHECKPOINT_COMPRESSION_THRESHOLD,
+        level=CHECKPOINT_COMPRESSION_LEVEL,
+    )
+
+
+# Private hooks of langgraph-checkpoint-redis the compressed savers override
+# or call; every read path funnels through _load_checkpoint as of 0.5.x (the
+# range requirements.txt pins)
+_HOOKS = ("_dump_checkpoint", "_load_checkpoint", "_recursive_deserialize")
+
+
+def _check_hooks(saver: type) -> None:
+    missing = [hook for hook in _HOOKS if not hasattr(saver, hook)]
+    if missing:
+        raise RuntimeError(
+            f"{saver.__name__} has no {', '.join(missing)}: checkpoint compression "
+            "needs langgraph-checkpoint-redis 0.5.x (or CHECKPOINT_COMPRESSION=none)"
+        )
+
+
+class _CompressedCheckpoints:
+    """
+    Saver mixin: pack a checkpoint's channel values into one compressed field
+    of its document, and unpack them wherever a checkpoint is loaded.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _wrap(self)
+
+    def _dump_checkpoint(self, checkpoint) -> Dict[str, Any]:
+        data = super()._dump_checkpoint(checkpoint)
+        if "channel_values" in data:
+            data["channel_values"] = self.serde.pack_values(data["channel_values"])
+        return data
+
+    def _load_checkpoint(self, checkpoint, channel_values, pending_sends):
+        unpacked = self.serde.unpack_values(channel_values)
+        if unpacked is not channel_values:
+            channel_values = self._recursive_deserialize(unpacked)
+        return super()._load_checkpoint(checkpoint, channel_values, pending_sends)
+
+
+class _CompressedWrites(_CompressedCheckpoints):
+    """Saver mixin: compress checkpoints and pending-write blobs above the threshold."""
+
+    def put_writes(self, *args, **kwargs) -> None:
+        with compressing():
+            return super().put_writes(*args, **kwargs)
+
+
+class _ACompressedWrites(_CompressedCheckpoints):
+    """Async `_CompressedWrites`."""
+
+    async def aput_writes(self, *args, **kwargs) -> None:
+        with compressing():
+            return await super().aput_writes(*args, **kwargs)
+
+
+class CompressedRedisSaver(_CompressedWrites, RedisSaver):
+    """RedisSaver with checkpoints and write blobs compressed past the threshold."""
+
+
+class AsyncCompressedRedisSaver(_ACompressedWrites, AsyncRedisSaver):
+    """Async `CompressedRedisSaver`."""
+
+
+class CompressedShallowRedisSaver(_CompressedWrites, ShallowRedisSaver):
+    """ShallowRedisSaver (latest checkpoint only), compressed likewise."""
+
+
+class AsyncCompressedShallowRedisSaver(_ACompressedWrites, AsyncShallowRedisSaver):
+    """Async `CompressedShallowRedisSaver`."""
+
+
+_SAVERS = {
+    # (CHECKPOINT_MODE, compressed, async_mode) -> saver class
+    ("full", False, False): RedisSaver,
+    ("full", False, True): AsyncRedisSaver,
+    ("full", True, False): CompressedRedisSaver,
+    ("full", True, True): AsyncCompressedRedisSaver,
+    ("shallow", False, False): ShallowRedisSaver,
+    ("shallow", False, True): AsyncShallowRedisSaver,
+    ("shallow", True, False): CompressedShallowRedisSaver,
+    ("shallow", True, True): AsyncCompressedShallowRedisSaver,
+}
+
+
+def redis_saver_class(async_mode: bool = False) -> type:
+    """
+    Saver class for CHECKPOINT_MODE ("full" history or "shallow", the latest
+    checkpoint per thread only) and CHECKPOINT_COMPRESSION ("none" → the
+    stock savers).
+    """
+    compressed = CHECKPOINT_COMPRESSION != "none"
+    try:
+        saver = _SAVERS[(CHECKPOINT_MODE, compressed, async_mode)]
+    except KeyError:
+        raise ValueError(f"Unknown CHECKPOINT_MODE {CHECKPOINT_MODE!r}") from None
+    if compressed:
+        _check_hooks(saver)
+    return saver
@@ -0,0 +1,158 @@
+# app/graph/context.py
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.config import (
+    CONTEXT_BUDGET_INSTRUCTIONS,
+    CONTEXT_BUDGET_PROFILE,
+    CONTEXT_BUDGET_PROJECTS,
+    CONTEXT_SELECTION,
+)
+from app.graph.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]{3,}")
+
+
+# helpers
+def _compact(value: Any) -> Any:
+    """Drop empty fields (None, "", [], {}) recursively."""
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall(text.lower()))
+
+
+@dataclass
+class Section:
+    """One rendered prompt section and what it cost."""
+
+    text: str
+    tokens: int
+    kept: int
+    total: int
+    available_tokens: int
+    # Cost of the items / fields left out for the budget (0 when all fit)
+    dropped_tokens: int = 0
+
+
+@dataclass
+class AssembledContext:
+    sections: Dict[str, Section] = field(default_factory=dict)
+
+    def prompt_vars(self) -> Dict[str, str]:
+        return {name: s.text for name, s in self.sections.items()}
+
+    @property
+    def tokens(self) -> int:
+        return sum(s.tokens for s in self.sections.values())
+
+    @property
+    def available_tokens(self) -> int:
+        return sum(s.available_tokens for s in self.sections.values())
+
+    @property
+    def dropped_tokens(self) -> int:
+        return sum(s.dropped_tokens for s in self.sections.values())
+
+
+class ContextAssembler:
+    """
+    Turn a user's long-term memories into the Profile / Projects /
+    Instructions strings of SYSTEM_PROMPT under a token budget per section.
+
+    Items are serialized as compact JSON with empty fields removed. When a
+    list does not fit, items are picked newest first ("recent") or by word
+    overlap with the current user message, newest first on ties
+    ("relevant"); the section then says how many were left out. Profile
+    fields are kept in schema order until the budget runs out.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        selection: str = CONTEXT_SELECTION,
+    ):
+        self.budgets = budgets or {
+            "profile": CONTEXT_BUDGET_PROFILE,
+            "projects": CONTEXT_BUDGET_PROJECTS,
+            "instructions": CONTEXT_BUDGET_INSTRUCTIONS,
+        }
+        if selection not in ("recent", "relevant"):
+            raise ValueError(f"Unknown context selection {selection!r}")
+        self.selection = selection
+
+    def assemble(self, memories: Dict[str, Any], query: str = "") -> AssembledContext:
+        """`memories` as returned by `load_memories` (lists newest first)."""
+        ctx = AssembledContext()
+        ctx.sections["profile"] = self._profile(memories.get("profile") or {})
+        for name in ("projects", "instructions"):
+            ctx.sections[name] = self._list(name, memories.get(name) or [], query)
+        return ctx
+
+    def _profile(self, profile: Dict[str, Any]) -> Section:
+        budget = self.budgets["profile"]
+        fields = _compact(profile)
+        available = count_tokens(_dumps(fields))
+        kept: Dict[str, Any] = {}
+        for key, value in fields.items():
+            candidate = {**kept, key: value}
+            if count_tokens(_dumps(candidate)) > budget:
+                break
+            kept = candidate
+        text = _dumps(kept)
+        dropped = sum(
+            count_tokens(_dumps({key: value}))
+            for key, value in fields.items()
+            if key not in kept
+        )
+        return Section(
+            text, count_tokens(text), len(kept), len(fields), available, dropped
+        )
+
+    def _order(self, items: List[Dict[str, Any]], query: str) -> List[int]:
+        if self.selection == "recent" or not query:
+            return list(range(len(items)))
+        q = _words(query)
+        scores = [len(q & _words(_dumps(item))) for item in items]
+        return sorted(range(len(items)), key=lambda i: (-scores[i], i))
+
+    def _list(self, name: str, items: List[Dict[str, Any]], query: str) -> Section:
+        budget = self.budgets[name]
+        rendered = [_dumps(_compact(item)) for item in items]
+        costs = [count_tokens(r) + 1 for r in rendered]
+
+        chosen, used = [], 2  # the enclosing brackets
+        for i in self._order(items, query):
+            if used + costs[i] > budget:
+                continue
+            chosen.append(i)
+            used += costs[i]
+
+        # Keep the store's newest-first order in the prompt
+        text = "[" + ",".join(rendered[i] for i in sorted(chosen)) + "]"
+        omitted = len(items) - len(chosen)
+        if omitted:
+            which = "older" if self.selection == "recent" else "less relevant"
+            text += f" ({omitted} {which} entries not shown)"
+        dropped = sum(costs) - sum(costs[i] for i in chosen)
+        return Section(
+            text, count_tokens(text), len(chosen), len(items), sum(costs) + 2, dropped
+        )
+
+
+assembler = ContextAssembler()
@@ -0,0 +1,231 @@
+# app/graph/dispatch.py
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from langchain_core.messages import AnyMessage, HumanMessage, ToolMessage
+from langchain_core.runnables.config import RunnableConfig
+from langgraph.config import get_stream_writer
+from langgraph.store.base import BaseStore
+
+from app.config import TOOL_CONCURRENCY, TOOL_CONCURRENCY_LIMITS, TOOL_MAX_WORKERS
+from app.graph.blob_store import offload
+from app.graph.tool_registry import ToolRegistry
+
+logger = logging.getLogger(__name__)
+
+MemoryHandler = Callable[[BaseStore, str, str], Any]
+
+
+def last_user_text(messages: List[AnyMessage]) -> str:
+    for m in reversed(messages):
+        if isinstance(m, HumanMessage):
+            return m.content if isinstance(m.content, str) else str(m.content)
+    return ""
+
+
+def _writer() -> Callable[[Any], None]:
+    """Writer for progress events ("custom" stream mode), no-op outside a run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _: None
+
+
+def _started(write, call: dict) -> float:
+    write(
+        {
+            "event": "tool_start",
+            "name": call["name"],
+            "id": call["id"],
+            "args": call["args"],
+        }
+    )
+    return time.perf_counter()
+
+
+def _finished(write, call: dict, result: ToolMessage, t0: float) -> ToolMessage:
+    write(
+        {
+            "event": "tool_end",
+            "name": call["name"],
+            "id": call["id"],
+            "status": result.status,
+            "ms": (time.perf_counter() - t0) * 1000,
+        }
+    )
+    return result
+
+
+def _error(call: dict, text: str) -> ToolMessage:
+    return ToolMessage(
+        content=text,
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+class ToolDispatcher:
+    """
+    Graph node that runs *every* tool call of the last AI message concurrently
+    and returns all the ToolMessages in a single step.
+
+    Regular tools are looked up in the ToolRegistry; the Update*Memory calls
+    go to the memory handlers. Each tool name has its own concurrency limit
+    (TOOL_CONCURRENCY, overridable per tool), shared by all conversations of
+    the process, so a burst of e.g. `web_fetch` calls cannot starve the rest.
+    Results over TOOL_OUTPUT_OFFLOAD_CHARS are moved to the blob store before
+    they reach the state (see `offload`). Each call emits tool_start /
+    tool_end events on the "custom" stream (see app/run.py).
+    """
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        memory: Mapping[str, MemoryHandler],
+        amemory: Mapping[str, MemoryHandler],
+        default_limit: int = TOOL_CONCURRENCY,
+        limits: Optional[Mapping[str, int]] = None,
+        max_workers: int = TOOL_MAX_WORKERS,
+    ):
+        self._registry = registry
+        self._memory = dict(memory)
+        self._amemory = dict(amemory)
+        self._default_limit = default_limit
+        self._limits = dict(TOOL_CONCURRENCY_LIMITS if limits is None else limits)
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="tool")
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        # asyncio semaphores belong to one event loop
+        self._asemaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def limit(self, name: str) -> int:
+        return self._limits.get(name, self._default_limit)
+
+    def _semaphore(self, name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if name not in self._semaphores:
+                self._semaphores[name] = threading.BoundedSemaphore(self.limit(name))
+            return self._semaphores[name]
+
+    def _asemaphore(self, name: str) -> asyncio.Semaphore:
+        per_loop = self._asemaphores.setdefault(asyncio.get_running_loop(), {})
+        if name not in per_loop:
+            per_loop[name] = asyncio.Semaphore(self.limit(name))
+        return per_loop[name]
+
+    def _plan(self, state) -> tuple[list, list]:
+        """
+        Split the tool calls into the ones to execute and duplicate memory
+        calls (same memory tool twice in one turn), which are only acked.
+        """
+        calls = getattr(state["messages"][-1], "tool_calls", []) or []
+        run, dupes, seen = [], [], set()
+        for call in calls:
+            if call["name"] in self._memory and call["name"] in seen:
+                dupes.append(call)
+            else:
+                seen.add(call["name"])
+                run.append(call)
+        return run, dupes
+
+    @staticmethod
+    def _dupe_acks(dupes: list) -> List[ToolMessage]:
+        return [
+            ToolMessage(
+                content="memory already updated this turn",
+                name=call["name"],
+                tool_call_id=call["id"],
+            )
+            for call in dupes
+        ]
+
+    # Sync path
+    def dispatch(self, state, config: RunnableConfig, store: BaseStore) -> dict:
+        run, dupes = self._plan(state)
+        user_id = config["configurable"]["user_id"]
+        user_message = last_user_text(state["messages"])
+
+        write = _writer()
+        # Each call runs in a copy of the node's context (the stream writer needs it)
+        futures = [
+            self._pool.submit(
+                contextvars.copy_context().run,
+                self._run,
+                call,
+                config,
+                store,
+                user_id,
+                user_message,
+                write,
+            )
+            for call in run
+        ]
+        return {"messages": [f.result() for f in futures] + self._dupe_acks(dupes)}
+
+    def _run(self, call, config, store, user_id, user_message, write) -> ToolMessage:
+        name = call["name"]
+        with self._semaphore(name):
+            t0 = _started(write, call)
+            result = self._call(call, config, store, user_id, user_message)
+            return _finished(write, call, result, t0)
+
+    def _call(self, call, config, store, user_id, user_message) -> ToolMessage:
+        name = call["name"]
+        try:
+            if name in self._memory:
+                ack = self._memory[name](store, user_id, user_message)
+                return ToolMessage(content=ack, name=name, tool_call_id=call["id"])
+            tool = self._registry.get(name)
+            if tool is None:
+                return _error(call, f"Error: {name} is not a valid tool.")
+            return offload(tool.invoke({**call, "type": "tool_call"}, config))
+        except Exception as exc:
+            logger.exception("Tool call %s failed", name)
+            return _error(call, f"Error: {exc!r}")
+
+    # Async path
+    async def adispatch(self, state, config: RunnableConfig, store: BaseStore) -> dict:
+        run, dupes = self._plan(state)
+        user_id = config["configurable"]["user_id"]
+        user_message = last_user_text(state["messages"])
+
+        write = _writer()
+        results = await asyncio.gather(
+            *(
+                self._arun(call, config, store, user_id, user_message, write)
+                for call in run
+            )
+        )
+        return {"messages": list(results) + self._dupe_acks(dupes)}
+
+    async def _arun(self, call, config, store, user_id, user_message, write) -> ToolMessage:
+        name = call["name"]
+        async with self._asemaphore(name):
+            t0 = _started(write, call)
+            result = await self._acall(call, config, store, user_id, user_message)
+            return _finished(write, call, result, t0)
+
+    async def _acall(self, call, config, store, user_id, user_message) -> ToolMessage:
+        name = call["name"]
+        try:
+            if name in self._amemory:
+                ack = await self._amemory[name](store, user_id, user_message)
+                return ToolMessage(content=ack, name=name, tool_call_id=call["id"])
+            tool = self._registry.get(name)
+            if tool is None:
+                return _error(call, f"Error: {name} is not a valid tool.")
+            result = await tool.ainvoke({**call, "type": "tool_call"}, config)
+            return await asyncio.to_thread(offload, result)
+        except Exception as exc:
+            logger.exception("Tool call %s failed", name)
+            return _error(call, f"Error: {exc!r}")
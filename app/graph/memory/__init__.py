@@ -1,11 +1,19 @@
 # app/graph/nodes/__init__.py
 
-from .profile_node import update_user_profile
-from .projects_node import update_projects
-from .instructions_node import update_instructions
+from .profile_node import update_user_profile, aupdate_user_profile
+from .projects_node import update_projects, aupdate_projects
+from .instructions_node import update_instructions, aupdate_instructions
 
-MEMORY = [
-    update_user_profile,
-    update_projects,
-    update_instructions,
-]
+# Memory tool-call name → handler(store, user_id, user_message) -> ack
+MEMORY = {
+    "UpdateProfileMemory": update_user_profile,
+    "UpdateProjectMemory": update_projects,
+    "UpdateInstructionMemory": update_instructions,
+}
+
+# Async twins, keyed the same way
+AMEMORY = {
+    "UpdateProfileMemory": aupdate_user_profile,
+    "UpdateProjectMemory": aupdate_projects,
+    "UpdateInstructionMemory": aupdate_instructions,
+}
@@ -0,0 +1,281 @@
+# app/graph/memory/cache.py
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import (
+    MEMORY_CACHE_BACKEND,
+    MEMORY_CACHE_SIZE,
+    MEMORY_CACHE_TTL,
+    MEMORY_WRITE_MODE,
+    REDIS_URI,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """
+    In-process LRU cache of each user's loaded long-term memories.
+
+    Entries are written on a miss by the assistant node and dropped by the
+    memory nodes (`update_user_profile`, `update_projects`,
+    `update_instructions`) right after they write to the store, so a cached
+    entry is never older than the user's last memory update.
+
+    A load can race with an update: read `generation(user)` before loading
+    and pass it to `set`, which drops the entry if the user was invalidated
+    in between (otherwise pre-update memories would stay cached until the
+    TTL).
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Clock value of each user's last invalidation (bounded); users
+        # evicted from it count as invalidated at `_floor`
+        self._clock = 0
+        self._floor = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[user_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, user_id: str) -> Any:
+        """Token to pass to `set` for a load starting now."""
+        with self._lock:
+            return self._clock
+
+    def set(
+        self, user_id: str, context: Dict[str, Any], generation: Any = None
+    ) -> None:
+        with self._lock:
+            if generation is not None and (
+                self._invalidated.get(user_id, self._floor) > generation
+            ):
+                return  # invalidated while loading: `context` may be stale
+            self._entries[user_id] = (time.monotonic(), context)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._clock += 1
+            self._invalidated[user_id] = self._clock
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.max_size:
+                _, clock = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, clock)
+            self._entries.pop(user_id, None)
+
+    # Nothing here does I/O, so the async API just delegates
+    async def aget(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.get(user_id)
+
+    async def ageneration(self, user_id: str) -> Any:
+        return self.generation(user_id)
+
+    async def aset(
+        self, user_id: str, context: Dict[str, Any], generation: Any = None
+    ) -> None:
+        self.set(user_id, context, generation)
+
+    async def ainvalidate(self, user_id: str) -> None:
+        self.invalidate(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class RedisMemoryCache(MemoryCache):
+    """
+    Same interface, backed by Redis so that every worker process shares the
+    entries and sees invalidations made by the others. Eviction is left to
+    the key TTL (and Redis' own maxmemory policy). The generation is a
+    per-user counter that `invalidate` increments; a conditional `set` only
+    writes (atomically, in a script) while it is unchanged.
+    """
+
+    KEY_PREFIX = "pa:memories:"
+    GEN_PREFIX = "pa:memories_gen:"
+    GEN_TTL = 7 * 24 * 3600
+
+    # KEYS = entry, generation; ARGV = expected generation, value, ttl (0 = none)
+    _SET_IF_CURRENT = """
+    if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then return 0 end
+    if tonumber(ARGV[3]) > 0 then
+        redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    else
+        redis.call('SET', KEYS[1], ARGV[2])
+    end
+    return 1
+    """
+
+    def __init__(self, redis_url: str, max_size: int = 1024, ttl: Optional[float] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self._redis_url = redis_url
+        self._client = None
+        self._aclient = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    @property
+    def aclient(self):
+        if self._aclient is None:
+            import redis.asyncio
+
+            self._aclient = redis.asyncio.Redis.from_url(self._redis_url)
+        return self._aclient
+
+    def _decode(self, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    @property
+    def _ex(self) -> Optional[int]:
+        return int(self.ttl) if self.ttl else None
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.client.get(self.KEY_PREFIX + user_id)
+        except Exception as e:
+            logger.warning("Memory cache read failed for %r: %s", user_id, e)
+            raw = None
+        return self._decode(raw)
+
+    def _decode_generation(self, raw: Optional[bytes]) -> str:
+        return raw.decode() if raw is not None else "0"
+
+    def generation(self, user_id: str) -> Any:
+        try:
+            return self._decode_generation(self.client.get(self.GEN_PREFIX + user_id))
+        except Exception as e:
+            logger.warning("Memory cache read failed for %r: %s", user_id, e)
+            return "-1"  # matches no generation, so the load isn't cached
+
+    def set(
+        self, user_id: str, context: Dict[str, Any], generation: Any = None
+    ) -> None:
+        value = json.dumps(context, default=str)
+        try:
+            if generation is None:
+                self.client.set(self.KEY_PREFIX + user_id, value, ex=self._ex)
+            else:
+                self.client.eval(
+                    self._SET_IF_CURRENT,
+                    2,
+                    self.KEY_PREFIX + user_id,
+                    self.GEN_PREFIX + user_id,
+                    generation,
+                    value,
+                    self._ex or 0,
+                )
+        except Exception as e:
+            logger.warning("Memory cache write failed for %r: %s", user_id, e)
+
+    def invalidate(self, user_id: str) -> None:
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(self.GEN_PREFIX + user_id)
+            pipe.expire(self.GEN_PREFIX + user_id, self.GEN_TTL)
+            pipe.delete(self.KEY_PREFIX + user_id)
+            pipe.execute()
+        except Exception as e:
+            logger.error("Memory cache invalidation failed for %r: %s", user_id, e)
+
+    async def aget(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.aclient.get(self.KEY_PREFIX + user_id)
+        except Exception as e:
+            logger.warning("Memory cache read failed for %r: %s", user_id, e)
+            raw = None
+        return self._decode(raw)
+
+    async def ageneration(self, user_id: str) -> Any:
+        try:
+            raw = await self.aclient.get(self.GEN_PREFIX + user_id)
+        except Exception as e:
+            logger.warning("Memory cache read failed for %r: %s", user_id, e)
+            return "-1"  # matches no generation, so the load isn't cached
+        return self._decode_generation(raw)
+
+    async def aset(
+        self, user_id: str, context: Dict[str, Any], generation: Any = None
+    ) -> None:
+        value = json.dumps(context, default=str)
+        try:
+            if generation is None:
+                await self.aclient.set(self.KEY_PREFIX + user_id, value, ex=self._ex)
+            else:
+                await self.aclient.eval(
+                    self._SET_IF_CURRENT,
+                    2,
+                    self.KEY_PREFIX + user_id,
+                    self.GEN_PREFIX + user_id,
+                    generation,
+                    value,
+                    self._ex or 0,
+                )
+        except Exception as e:
+            logger.warning("Memory cache write failed for %r: %s", user_id, e)
+
+    async def ainvalidate(self, user_id: str) -> None:
+        try:
+            pipe = self.aclient.pipeline()
+            pipe.incr(self.GEN_PREFIX + user_id)
+            pipe.expire(self.GEN_PREFIX + user_id, self.GEN_TTL)
+            pipe.delete(self.KEY_PREFIX + user_id)
+            await pipe.execute()
+        except Exception as e:
+            logger.error("Memory cache invalidation failed for %r: %s", user_id, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "backend": "redis", "size": None}
+
+
+def make_memory_cache() -> MemoryCache:
+    # Background writes happen in the worker process, whose invalidations
+    # only reach the API workers through a shared cache
+    if MEMORY_CACHE_BACKEND == "redis" or MEMORY_WRITE_MODE == "background":
+        return RedisMemoryCache(REDIS_URI, MEMORY_CACHE_SIZE, MEMORY_CACHE_TTL)
+    return MemoryCache(MEMORY_CACHE_SIZE, MEMORY_CACHE_TTL)
+
+
+# Process-wide instance shared by the assistant and the memory nodes
+memory_cache = make_memory_cache()
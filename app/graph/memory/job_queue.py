@@ -0,0 +1,155 @@
+# app/graph/memory/job_queue.py
+
+import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import (
+    MEMORY_JOB_MAX_ATTEMPTS,
+    MEMORY_WORKER_LEASE_SECONDS,
+    REDIS_URI,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED_ACK = "memory update queued; it will be available from the next message"
+
+
+class MemoryJobQueue:
+    """
+    Durable queue of memory-extraction jobs on a Redis list.
+
+    Producers LPUSH a job; a worker atomically moves it to its own processing
+    list with BLMOVE and removes it only once the job succeeded. Each worker
+    holds a lease it keeps renewing (`heartbeat`); the in-flight jobs of a
+    worker whose lease ran out are put back on the queue by `recover`.
+    Jobs failing MEMORY_JOB_MAX_ATTEMPTS times are parked on a dead-letter list.
+    """
+
+    def __init__(self, redis_url: str = REDIS_URI, name: str = "pa:memory_jobs"):
+        self._redis_url = redis_url
+        self.name = name
+        self.dead = f"{name}:dead"
+        self._client = None
+        self._aclient = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    @property
+    def aclient(self):
+        if self._aclient is None:
+            import redis.asyncio
+
+            self._aclient = redis.asyncio.Redis.from_url(self._redis_url)
+        return self._aclient
+
+    def processing(self, consumer: str) -> str:
+        return f"{self.name}:processing:{consumer}"
+
+    def lease(self, consumer: str) -> str:
+        return f"{self.name}:lease:{consumer}"
+
+    @staticmethod
+    def _job(tool: str, user_id: str, user_message: str) -> str:
+        return json.dumps(
+            {
+                "id": uuid.uuid4().hex,
+                "tool": tool,
+                "user_id": user_id,
+                "message": user_message,
+                "enqueued_at": time.time(),
+                "attempts": 0,
+            }
+        )
+
+    # Producer side
+    def enqueue(self, tool: str, user_id: str, user_message: str) -> None:
+        self.client.lpush(self.name, self._job(tool, user_id, user_message))
+
+    async def aenqueue(self, tool: str, user_id: str, user_message: str) -> None:
+        await self.aclient.lpush(self.name, self._job(tool, user_id, user_message))
+
+    def handlers(self, tools) -> Tuple[Dict[str, Callable], Dict[str, Callable]]:
+        """
+        Drop-in replacements for the MEMORY / AMEMORY handler maps that only
+        enqueue the job and acknowledge the tool call immediately.
+        """
+
+        def make(tool: str):
+            def handler(store, user_id: str, user_message: str) -> str:
+                self.enqueue(tool, user_id, user_message)
+                return QUEUED_ACK
+
+            async def ahandler(store, user_id: str, user_message: str) -> str:
+                await self.aenqueue(tool, user_id, user_message)
+                return QUEUED_ACK
+
+            return handler, ahandler
+
+        made = {tool: make(tool) for tool in tools}
+        return (
+            {tool: pair[0] for tool, pair in made.items()},
+            {tool: pair[1] for tool, pair in made.items()},
+        )
+
+    # Consumer side
+    def heartbeat(
+        self, consumer: str, ttl: float = MEMORY_WORKER_LEASE_SECONDS
+    ) -> None:
+        """Take or renew `consumer`'s lease on its processing list."""
+        self.client.set(self.lease(consumer), time.time(), px=int(ttl * 1000))
+
+    def release(self, consumer: str) -> None:
+        self.client.delete(self.lease(consumer))
+
+    def recover(self) -> int:
+        """Move the jobs of every worker whose lease has expired back to the queue."""
+        prefix = self.processing("")
+        moved = 0
+        for key in self.client.scan_iter(match=prefix + "*"):
+            consumer = key.decode()[len(prefix) :]
+            if self.client.exists(self.lease(consumer)):
+                continue
+            count = 0
+            while self.client.lmove(key, self.name, "RIGHT", "RIGHT"):
+                count += 1
+            if count:
+                logger.warning(
+                    "Recovered %d unfinished memory jobs of %s", count, consumer
+                )
+            moved += count
+        return moved
+
+    def pop(self, consumer: str, timeout: float = 5.0) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        raw = self.client.blmove(
+            self.name, self.processing(consumer), timeout, "RIGHT", "LEFT"
+        )
+        if raw is None:
+            return None
+        return raw, json.loads(raw)
+
+    def ack(self, consumer: str, raw: bytes) -> None:
+        self.client.lrem(self.processing(consumer), 1, raw)
+
+    def fail(self, consumer: str, raw: bytes, job: Dict[str, Any]) -> None:
+        job["attempts"] = job.get("attempts", 0) + 1
+        target = self.dead if job["attempts"] >= MEMORY_JOB_MAX_ATTEMPTS else self.name
+        pipe = self.client.pipeline()
+        pipe.lrem(self.processing(consumer), 1, raw)
+        pipe.lpush(target, json.dumps(job))
+        pipe.execute()
+
+    def depth(self) -> int:
+        return self.client.llen(self.name)
+
+
+# Process-wide instance shared by the dispatcher (producer) and the worker
+memory_queue = MemoryJobQueue()
@@ -0,0 +1,98 @@
+# app/graph/memory/loader.py
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from langgraph.store.base import BaseStore, GetOp, Item, SearchOp
+
+from app.config import MEMORY_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY = "user_profile"
+LIST_NAMESPACES = ("instructions", "projects")
+
+
+class _Pager:
+    """Book-keeping shared by the sync and async loaders."""
+
+    def __init__(self, user_id: str, page_size: int):
+        self.user_id = user_id
+        self.page_size = page_size
+        self.offset = 0
+        self.profile: Optional[Item] = None
+        self.pages: Dict[str, List[Item]] = {name: [] for name in LIST_NAMESPACES}
+        self.pending: List[str] = list(LIST_NAMESPACES)
+
+    def first_ops(self) -> list:
+        return [GetOp(("profile", self.user_id), PROFILE_KEY), *self.next_ops()]
+
+    def next_ops(self) -> list:
+        return [
+            SearchOp((name, self.user_id), limit=self.page_size, offset=self.offset)
+            for name in self.pending
+        ]
+
+    def add_first(self, results: list) -> None:
+        self.profile, *pages = results
+        self.add(pages)
+
+    def add(self, results: list) -> None:
+        for name, items in zip(self.pending, results):
+            self.pages[name].extend(items)
+        self.pending = [
+            name
+            for name, items in zip(self.pending, results)
+            if len(items) == self.page_size
+        ]
+        self.offset += self.page_size
+
+    def result(self) -> Dict[str, Any]:
+        logger.debug(
+            "Loaded memories for %r: %d instructions, %d projects",
+            self.user_id,
+            len(self.pages["instructions"]),
+            len(self.pages["projects"]),
+        )
+        profile = self.profile.value if self.profile and self.profile.value else {}
+        return {"profile": profile, **{n: _newest_first(i) for n, i in self.pages.items()}}
+
+
+def _newest_first(items: List[Item]) -> List[Dict[str, Any]]:
+    return [i.value for i in sorted(items, key=lambda i: i.updated_at, reverse=True)]
+
+
+def load_memories(
+    store: BaseStore,
+    user_id: str,
+    page_size: int = MEMORY_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """
+    Load a user's profile, instructions and projects with one `store.batch`.
+
+    The first batch fetches the profile and the first page of both list
+    namespaces; further pages are only requested (again batched) for the
+    namespaces whose last page came back full, so every record is returned
+    instead of whatever the store's default search limit lets through.
+
+    Returns {"profile": dict, "instructions": [dict], "projects": [dict]},
+    with list entries ordered newest first.
+    """
+    pager = _Pager(user_id, page_size)
+    pager.add_first(store.batch(pager.first_ops()))
+    while pager.pending:
+        pager.add(store.batch(pager.next_ops()))
+    return pager.result()
+
+
+async def aload_memories(
+    store: BaseStore,
+    user_id: str,
+    page_size: int = MEMORY_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """Async version of `load_memories` (uses `store.abatch`)."""
+    pager = _Pager(user_id, page_size)
+    pager.add_first(await store.abatch(pager.first_ops()))
+    while pager.pending:
+        pager.add(await store.abatch(pager.next_ops()))
+    return pager.result()
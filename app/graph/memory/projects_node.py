@@ -5,62 +5,39 @@ import uuid
 import logging
 from datetime import datetime
 
-from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables.config import RunnableConfig
+from langchain_core.messages import SystemMessage
 from langgraph.store.base import BaseStore
-from langgraph.graph import MessagesState
 
 from app.config import get_llm
+from app.graph.memory.cache import memory_cache
 from app.schemas.project_schema import Project
 
 logger = logging.getLogger(__name__)
 
 # Initialize the LLM once at import time
-model = get_llm()
+model = get_llm("extract")
 
 
-def update_projects(
-    state: MessagesState,
-    config: RunnableConfig,
-    store: BaseStore,
-) -> dict[str, list]:
-    """
-    Extract and persist a new project plan to the 'projects' namespace.
-
-    Steps:
-    1. Extract the triggering user message (two messages back).
-    2. Prompt the LLM to generate a concise title and description
-       conforming to the Project schema.
-    3. Parse the LLM's JSON reply into a project dict.
-    4. Persist it under namespace ("projects", user_id) with an auto-generated key.
-    5. Return a ToolMessage acknowledging the original UpdateMemory call.
-    """
-    # 1) Identify user and namespace
-    user_id = config["configurable"]["user_id"]
-    namespace = ("projects", user_id)
-    user_message = state["messages"][-2].content.strip()
-
-    logger.debug("Generating new project from message: %r", user_message)
-
-    # 2) Build the system prompt using the Project schema
-    system_prompt = (
-        f"System time (UTC): {datetime.utcnow().isoformat()}\n\n"
-        "You are an assistant that extracts project plans from a user message.\n"
-        "Here is the JSON schema for a Project:\n\n"
-        f"{Project.schema_json(indent=2)}\n\n"
-        "User just said:\n"
-        f'"{user_message}"\n\n'
-        "Generate a JSON object that conforms exactly to the schema,\n"
-        "with a concise `title` and a clear `description`.  \n"
-        'Set `due_date` to null and `status` to "planned".\n'
-        "Return ONLY the raw JSON document — absolutely no code fences, no markdown, no commentary."
+def _project_prompt(user_message: str) -> SystemMessage:
+    return SystemMessage(
+        content=(
+            f"Today's date (UTC): {datetime.utcnow().date().isoformat()}\n\n"
+            "You are an assistant that extracts project plans from a user message.\n"
+            "Here is the JSON schema for a Project:\n\n"
+            f"{Project.schema_json(indent=2)}\n\n"
+            "User just said:\n"
+            f'"{user_message}"\n\n'
+            "Generate a JSON object that conforms exactly to the schema,\n"
+            "with a concise `title` and a clear `description`.  \n"
+            'Set `due_date` to null and `status` to "planned".\n'
+            "Return ONLY the raw JSON document — absolutely no code fences, no markdown, no commentary."
+        )
     )
-    system_msg = SystemMessage(content=system_prompt)
 
-    # 3) Invoke the LLM and parse its JSON output
-    reply = model.invoke([system_msg])
+
+def _parse_project(reply, user_message: str) -> dict:
     try:
-        project_data = json.loads(reply.content)
+        return json.loads(reply.content)
     except json.JSONDecodeError as e:
         logger.error(
             "Failed to parse project JSON: %s\nLLM reply was:\n%s",
@@ -69,24 +46,58 @@ def update_projects(
         )
         # Fallback: build a minimal project
         title = user_message.split(".")[0][:50] or user_message[:50]
-        project_data = {
+        return {
             "title": title,
             "description": user_message,
             "due_date": None,
             "status": "planned",
         }
 
+
+def update_projects(store: BaseStore, user_id: str, user_message: str) -> str:
+    """
+    Extract and persist a new project plan to the 'projects' namespace.
+
+    Steps:
+    1. Take the triggering user message.
+    2. Prompt the LLM to generate a concise title and description
+       conforming to the Project schema.
+    3. Parse the LLM's JSON reply into a project dict.
+    4. Persist it under namespace ("projects", user_id) with an auto-generated key
+       and drop the cached memory context.
+    5. Return the acknowledgement for the UpdateProjectMemory tool call.
+    """
+    # 1) Identify user and namespace
+    namespace = ("projects", user_id)
+    user_message = user_message.strip()
+
+    logger.debug("Generating new project from message: %r", user_message)
+
+    # 2-3) Invoke the LLM and parse its JSON output
+    reply = model.invoke([_project_prompt(user_message)])
+    project_data = _parse_project(reply, user_message)
+
     # 4) Persist the project
     new_key = uuid.uuid4().hex
     store.put(namespace, new_key, project_data)
+    memory_cache.invalidate(user_id)
     logger.debug("Stored project %r for %s", new_key, user_id)
 
     # 5) Acknowledge the original UpdateMemory call
-    tool_call = state["messages"][-1].tool_calls[0]
-    ack = ToolMessage(
-        content="project saved",
-        name=tool_call["name"],
-        tool_call_id=tool_call["id"],
-    )
+    return "project saved"
+
+
+async def aupdate_projects(store: BaseStore, user_id: str, user_message: str) -> str:
+    """Async version of `update_projects`."""
+    namespace = ("projects", user_id)
+    user_message = user_message.strip()
+
+    reply = await model.ainvoke([_project_prompt(user_message)])
+    project_data = _parse_project(reply, user_message)
+
+    new_key = uuid.uuid4().hex
+    await store.aput(namespace, new_key, project_data)
+    await memory_cache.ainvalidate(user_id)
+    logger.debug("Stored project %r for %s", new_key, user_id)
 
-    return {"messages": [ack]}
+    return "project saved"
@@ -2,58 +2,178 @@
 
 import logging
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-from langchain_core.messages import HumanMessage, RemoveMessage
+from langchain_core.messages import HumanMessage, RemoveMessage, ToolMessage
 from langchain_core.runnables.config import RunnableConfig
 from langgraph.store.base import BaseStore
 
 from app.graph.state import ChatState
-from app.config import get_llm
+from app.config import (
+    HISTORY_HIGH_WATER_TOKENS,
+    HISTORY_LOW_WATER_TOKENS,
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_MESSAGE_CHARS,
+    get_llm,
+)
+from app.graph.tokens import count_message_tokens, count_tokens
+from app.metrics import metrics
 
 logger = logging.getLogger(__name__)
-llm = get_llm()
+llm = get_llm("summarize")
 
 
-def summarize_node(
-    state: ChatState, config: RunnableConfig, store: BaseStore
-) -> Dict[str, Any]:
+# helpers
+_ROLES = {"human": "User", "ai": "Assistant", "system": "System"}
+
+
+def needs_summary(messages: list) -> bool:
+    """True once the history is above the high-water mark."""
+    return count_message_tokens(messages) > HISTORY_HIGH_WATER_TOKENS
+
+
+def _split(messages: list) -> Tuple[list, list]:
+    """
+    (messages to evict into the summary, messages to keep verbatim).
+
+    Keeps the newest messages that fit under the low-water mark (at least
+    the last one). The kept window never starts with a ToolMessage: its
+    AIMessage tool call would be evicted and OpenAI rejects a tool result
+    without one. The whole call/result group is evicted instead, or kept
+    if it is at the very end.
+    """
+    cut, kept = len(messages) - 1, 0
+    for i in range(len(messages) - 1, -1, -1):
+        kept += count_message_tokens([messages[i]])
+        if kept > HISTORY_LOW_WATER_TOKENS and i < len(messages) - 1:
+            break
+        cut = i
+
+    start = cut
+    while cut < len(messages) and isinstance(messages[cut], ToolMessage):
+        cut += 1
+    if cut == len(messages):
+        cut = start
+        while cut > 0 and isinstance(messages[cut], ToolMessage):
+            cut -= 1
+    return messages[:cut], messages[cut:]
+
+
+def _clip(text: str, limit: int = SUMMARY_MESSAGE_CHARS) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit] + f" …[{len(text) - limit} chars omitted]"
+
+
+def _transcript(messages: list) -> str:
     """
-    Summarize older chat turns into a rolling summary and prune them.
+    Plain-text rendering of the evicted messages. Tool calls and results
+    become lines of text (so no call/result pairing rules apply) and every
+    message is clipped, so a 20k-char web page costs SUMMARY_MESSAGE_CHARS.
     """
-    # Load old summary
-    old_summary = state.get("summary", "")
+    lines = []
+    for m in messages:
+        content = m.content if isinstance(m.content, str) else str(m.content)
+        if isinstance(m, ToolMessage):
+            lines.append(f"Tool result ({m.name}): {_clip(content)}")
+            continue
+        if content:
+            lines.append(f"{_ROLES.get(m.type, m.type)}: {_clip(content)}")
+        for call in getattr(m, "tool_calls", None) or []:
+            lines.append(f"Assistant called {call['name']}({_clip(str(call['args']), 300)})")
+    return "\n".join(lines)
 
-    # Create the prompt
+
+def _summary_request(old_summary: str, evicted: list) -> list:
+    """Prompt folding only the newly evicted messages into the old summary."""
+    # The date only: a timestamp would make every request unique to the LLM cache
+    today = datetime.utcnow().date().isoformat()
+    transcript = _transcript(evicted)
     if old_summary:
-        summary_message = f"""
-            System time (UTC): {datetime.utcnow().isoformat()}
+        content = f"""
+            Today's date (UTC): {today}
 
-            You already have this one-paragraph summary of the conversation so far:
+            You already have this summary of the earlier conversation:
             {old_summary}
 
-            Now extend and refine that summary into a single, concise paragraph by incorporating the new messages above.
-            • Preserve every point from the existing summary.
+            These messages followed it:
+            {transcript}
+
+            Extend and refine the summary into a single, concise paragraph by incorporating these messages.
+            • Preserve every important point from the existing summary.
             • Seamlessly fold in any new details.
+            • Stay under {SUMMARY_MAX_TOKENS} tokens.
             • Return only the updated summary paragraph—no extra labels or commentary.
             """
     else:
-        summary_message = f"""
-            System time (UTC): {datetime.utcnow().isoformat()}
+        content = f"""
+            Today's date (UTC): {today}
+
+            Conversation:
+            {transcript}
 
             Create a one-paragraph summary of the conversation above that captures all key points, intentions, and actions.
-            Return only the summary paragraph—no extra text.
+            Stay under {SUMMARY_MAX_TOKENS} tokens. Return only the summary paragraph—no extra text.
             """
+    metrics.observe("summary.input_tokens", count_tokens(content))
+    return [HumanMessage(content=content)]
+
 
-    messages = state["messages"] + [HumanMessage(content=summary_message)]
+def _compaction_request(summary: str) -> list:
+    target = SUMMARY_MAX_TOKENS // 2
+    return [
+        HumanMessage(
+            content=(
+                f"Compress this conversation summary to at most {target} tokens. "
+                "Keep decisions, open tasks, names and numbers; drop small talk and "
+                "details that no longer matter. Return only the compressed summary.\n\n"
+                + summary
+            )
+        )
+    ]
 
-    # Invoke the LLM with a SystemMessage
-    response = llm.invoke(messages)
-    new_summary = response.content.strip()
 
-    # Delete all but the 2 most recent messages
-    deletes = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
+def _truncate(summary: str) -> str:
+    """Last resort when the compaction still doesn't fit: keep the newest part."""
+    while summary and count_tokens(summary) > SUMMARY_MAX_TOKENS:
+        summary = summary[max(1, len(summary) // 10) :]
+    return summary
 
-    # print("summary", new_summary)
 
+def _prune(evicted: list, new_summary: str) -> Dict[str, Any]:
+    deletes = [RemoveMessage(id=m.id) for m in evicted]
     return {"summary": new_summary, "messages": deletes}
+
+
+def summarize_node(
+    state: ChatState, config: RunnableConfig, store: BaseStore
+) -> Dict[str, Any]:
+    """
+    Fold the messages leaving the window into the rolling summary and prune
+    them. Only those messages (clipped) and the previous summary are sent,
+    so each run costs about the same however long the thread is; a summary
+    that outgrows SUMMARY_MAX_TOKENS is compacted by a second call.
+    """
+    evicted, _ = _split(state["messages"])
+    if not evicted:
+        return {}
+    summary = llm.invoke(_summary_request(state.get("summary", ""), evicted))
+    summary = summary.content.strip()
+    if count_tokens(summary) > SUMMARY_MAX_TOKENS:
+        summary = _truncate(llm.invoke(_compaction_request(summary)).content.strip())
+    return _prune(evicted, summary)
+
+
+async def asummarize_node(
+    state: ChatState, config: RunnableConfig, store: BaseStore
+) -> Dict[str, Any]:
+    """Async version of `summarize_node`."""
+    evicted, _ = _split(state["messages"])
+    if not evicted:
+        return {}
+    summary = await llm.ainvoke(_summary_request(state.get("summary", ""), evicted))
+    summary = summary.content.strip()
+    if count_tokens(summary) > SUMMARY_MAX_TOKENS:
+        reply = await llm.ainvoke(_compaction_request(summary))
+        summary = _truncate(reply.content.strip())
+    return _prune(evicted, summary)
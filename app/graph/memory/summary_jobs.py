@@ -0,0 +1,185 @@
+# app/graph/memory/summary_jobs.py
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from langchain_core.runnables.config import RunnableConfig
+
+from app.graph.memory.short_term_memory import asummarize_node, summarize_node
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Node the background update is attributed to (see `_build`)
+SUMMARY_NODE = "summarize_conversation"
+
+
+def _thread_config(config: RunnableConfig) -> RunnableConfig:
+    # Latest checkpoint of the thread, not the one the turn started from
+    configurable = config["configurable"]
+    return {
+        "configurable": {
+            "thread_id": configurable["thread_id"],
+            "user_id": configurable.get("user_id"),
+        }
+    }
+
+
+def _pinned(config: RunnableConfig, head) -> RunnableConfig:
+    # `config` pointing at the checkpoint `head` was read from
+    return {"configurable": {**config["configurable"], **head.config["configurable"]}}
+
+
+def _checkpoint_id(snapshot) -> str:
+    return snapshot.config["configurable"]["checkpoint_id"]
+
+
+class BackgroundSummarizer:
+    """
+    Summarize a thread after the reply has been returned.
+
+    The graph's last node calls `schedule` (thread pool) or `aschedule` (task
+    on the serving loop) for the finished turn. The job waits until the
+    thread's latest checkpoint is at rest (the turn's last step saved),
+    summarizes that checkpoint with the usual summarize node and writes the
+    result — the new summary plus RemoveMessages for the evicted messages —
+    on top of it with `update_state`. If another turn moved the thread on in
+    the meantime, the summary is dropped and computed again from the new
+    head (up to `attempts` times), so it never lands on a state it wasn't
+    made from. There is at most one job per thread at a time.
+
+    Each compiled graph gets its own summarizer (see `attach`).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        attempts: int = 3,
+        settle: float = 0.05,
+        polls: int = 40,
+    ):
+        self._graph = None
+        self.attempts = attempts
+        # How often / long to wait for the checkpoint to come to rest
+        self.settle = settle
+        self.polls = polls
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="summary")
+        self._lock = threading.Lock()
+        self._inflight: set = set()
+        self._tasks: set = set()
+
+    def attach(self, graph) -> None:
+        """Compiled graph whose checkpoints receive the summaries."""
+        self._graph = graph
+
+    def _claim(self, thread_id: str) -> bool:
+        with self._lock:
+            if self._graph is None or thread_id in self._inflight:
+                return False
+            self._inflight.add(thread_id)
+            return True
+
+    def _release(self, thread_id: str) -> None:
+        with self._lock:
+            self._inflight.discard(thread_id)
+
+    def _stale(self, thread_id: str, summarized: str) -> None:
+        metrics.incr("summary.background_stale")
+        logger.info(
+            "Thread %s moved past checkpoint %s while summarizing; retrying",
+            thread_id,
+            summarized,
+        )
+
+    # Sync path
+    def _head(self, graph, config: RunnableConfig):
+        """Latest checkpoint once no step is pending on it, else None."""
+        for _ in range(self.polls):
+            head = graph.get_state(config)
+            if not head.next:
+                return head
+            time.sleep(self.settle)
+        return None
+
+    def schedule(self, config: RunnableConfig) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        if self._claim(thread_id):
+            self._pool.submit(self._run, self._graph, _thread_config(config))
+
+    def _run(self, graph, config: RunnableConfig) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        t0 = time.perf_counter()
+        try:
+            for _ in range(self.attempts):
+                head = self._head(graph, config)
+                if head is None:
+                    break
+                updates = summarize_node(head.values, config, None)
+                if not updates:
+                    return
+                if _checkpoint_id(graph.get_state(config)) != _checkpoint_id(head):
+                    self._stale(thread_id, _checkpoint_id(head))
+                    continue
+                graph.update_state(_pinned(config, head), updates, as_node=SUMMARY_NODE)
+                metrics.observe(
+                    "summary.background_ms", (time.perf_counter() - t0) * 1000
+                )
+                return
+            logger.warning("Gave up summarizing thread %s: it kept moving", thread_id)
+        except Exception:
+            logger.exception("Background summary of thread %s failed", thread_id)
+        finally:
+            self._release(thread_id)
+
+    # Async path
+    async def _ahead(self, graph, config: RunnableConfig):
+        for _ in range(self.polls):
+            head = await graph.aget_state(config)
+            if not head.next:
+                return head
+            await asyncio.sleep(self.settle)
+        return None
+
+    def aschedule(self, config: RunnableConfig) -> Optional[asyncio.Task]:
+        thread_id = config["configurable"]["thread_id"]
+        if not self._claim(thread_id):
+            return None
+        task = asyncio.get_running_loop().create_task(
+            self._arun(self._graph, _thread_config(config))
+        )
+        # Keep a reference until it is done (the loop only holds a weak one)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _arun(self, graph, config: RunnableConfig) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        t0 = time.perf_counter()
+        try:
+            for _ in range(self.attempts):
+                head = await self._ahead(graph, config)
+                if head is None:
+                    break
+                updates = await asummarize_node(head.values, config, None)
+                if not updates:
+                    return
+                latest = await graph.aget_state(config)
+                if _checkpoint_id(latest) != _checkpoint_id(head):
+                    self._stale(thread_id, _checkpoint_id(head))
+                    continue
+                await graph.aupdate_state(
+                    _pinned(config, head), updates, as_node=SUMMARY_NODE
+                )
+                metrics.observe(
+                    "summary.background_ms", (time.perf_counter() - t0) * 1000
+                )
+                return
+            logger.warning("Gave up summarizing thread %s: it kept moving", thread_id)
+        except Exception:
+            logger.exception("Background summary of thread %s failed", thread_id)
+        finally:
+            self._release(thread_id)
@@ -0,0 +1,144 @@
+# app/graph/memory/worker.py
+"""
+Background memory writer: runs the profile / project / instruction
+extraction jobs queued by the assistant when MEMORY_WRITE_MODE=background.
+
+    python -m app.graph.memory.worker --concurrency 4
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import typer
+from langgraph.store.base import BaseStore
+
+from app.config import MEMORY_WORKER_LEASE_SECONDS, MEMORY_WORKERS, POSTGRES_POOL_MIN
+from app.graph.postgres import postgres_store
+from app.graph.setup import mark_setup_done, setup_needed
+from app.graph.memory import MEMORY
+from app.graph.memory.job_queue import MemoryJobQueue, memory_queue
+
+logger = logging.getLogger(__name__)
+
+
+def _process(
+    queue: MemoryJobQueue,
+    store: BaseStore,
+    consumer: str,
+    raw: bytes,
+    job: Dict[str, Any],
+) -> None:
+    handler = MEMORY.get(job["tool"])
+    if handler is None:
+        logger.error("Dropping memory job %s for unknown tool %r", job["id"], job["tool"])
+        queue.ack(consumer, raw)
+        return
+
+    try:
+        handler(store, job["user_id"], job["message"])
+    except Exception:
+        logger.exception("Memory job %s (%s) failed", job["id"], job["tool"])
+        queue.fail(consumer, raw, job)
+        return
+
+    queue.ack(consumer, raw)
+    logger.info(
+        "Memory job %s (%s) for %r done %.1fs after enqueue",
+        job["id"],
+        job["tool"],
+        job["user_id"],
+        time.time() - job["enqueued_at"],
+    )
+
+
+def default_consumer() -> str:
+    """A name no other worker uses, even on the same host."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _keep_lease(
+    queue: MemoryJobQueue, consumer: str, done: threading.Event, lease: float
+) -> None:
+    # Renew our lease and pick up the jobs of workers that lost theirs
+    while not done.wait(lease / 3):
+        try:
+            queue.heartbeat(consumer, lease)
+            queue.recover()
+        except Exception as e:
+            logger.warning("Memory worker %s heartbeat failed: %s", consumer, e)
+
+
+def run_worker(
+    store: BaseStore,
+    concurrency: int = MEMORY_WORKERS,
+    consumer: Optional[str] = None,
+    queue: MemoryJobQueue = memory_queue,
+    stop: Optional[threading.Event] = None,
+    lease: float = MEMORY_WORKER_LEASE_SECONDS,
+) -> None:
+    """Pull jobs until `stop` is set, with at most `concurrency` in flight."""
+    consumer = consumer or default_consumer()
+    stop = stop or threading.Event()
+    slots = threading.BoundedSemaphore(concurrency)
+
+    queue.heartbeat(consumer, lease)
+    queue.recover()
+    done = threading.Event()
+    threading.Thread(
+        target=_keep_lease,
+        args=(queue, consumer, done, lease),
+        name="memory-lease",
+        daemon=True,
+    ).start()
+    logger.info("Memory worker %s started (concurrency=%d)", consumer, concurrency)
+
+    def work(raw, job):
+        try:
+            _process(queue, store, consumer, raw, job)
+        finally:
+            slots.release()
+
+    try:
+        with ThreadPoolExecutor(concurrency, thread_name_prefix="memory-job") as pool:
+            while not stop.is_set():
+                slots.acquire()
+                popped = queue.pop(consumer, timeout=1.0)
+                if popped is None:
+                    slots.release()
+                    continue
+                pool.submit(work, *popped)
+    finally:
+        done.set()
+    # Stopped cleanly with nothing in flight; after a crash the lease expires
+    queue.release(consumer)
+
+
+def main(
+    concurrency: int = typer.Option(MEMORY_WORKERS, help="Jobs processed in parallel."),
+    consumer: str = typer.Option(
+        None,
+        help="Worker name (owns a processing list). Defaults to host:pid:random.",
+    ),
+):
+    """Process queued memory-extraction jobs until interrupted."""
+    logging.basicConfig(level=logging.INFO)
+    # One pooled connection per in-flight job
+    pool_min = min(POSTGRES_POOL_MIN, concurrency)
+    with postgres_store(min_size=pool_min, max_size=concurrency, name="worker") as store:
+        if setup_needed():
+            store.setup()
+            mark_setup_done()
+        try:
+            run_worker(store, concurrency, consumer)
+        except KeyboardInterrupt:
+            typer.secho("Memory worker stopped", fg=typer.colors.YELLOW)
+
+
+if __name__ == "__main__":
+    typer.run(main)
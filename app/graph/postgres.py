@@ -0,0 +1,110 @@
+# app/graph/postgres.py
+
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+from langgraph.store.postgres import PostgresStore
+from langgraph.store.postgres.aio import AsyncPostgresStore
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from app.config import (
+    POSTGRES_POOL_MAX,
+    POSTGRES_POOL_MIN,
+    POSTGRES_POOL_TIMEOUT,
+    POSTGRES_PREPARE_THRESHOLD,
+    POSTGRES_URI,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# helpers
+def _connection_kwargs() -> dict:
+    # Same as langgraph's own pool setup, with a configurable prepare_threshold
+    return {
+        "autocommit": True,
+        "prepare_threshold": POSTGRES_PREPARE_THRESHOLD,
+        "row_factory": dict_row,
+    }
+
+
+def _pool_kwargs(name: str, min_size: int, max_size: int) -> dict:
+    return {
+        "min_size": min_size,
+        "max_size": max_size,
+        "timeout": POSTGRES_POOL_TIMEOUT,
+        "kwargs": _connection_kwargs(),
+        "name": name,
+        "open": False,
+    }
+
+
+def _register(pool) -> None:
+    """Export the pool's own counters (size, waiting, wait time, errors …)."""
+    metrics.gauge(f"postgres.{pool.name}", pool.get_stats)
+
+
+class TimedConnectionPool(ConnectionPool):
+    """ConnectionPool that records how long each request waited for a connection."""
+
+    def getconn(self, timeout: Optional[float] = None):
+        t0 = time.perf_counter()
+        conn = super().getconn(timeout)
+        metrics.observe("postgres.pool_wait_ms", (time.perf_counter() - t0) * 1000)
+        return conn
+
+
+class AsyncTimedConnectionPool(AsyncConnectionPool):
+    """Async `TimedConnectionPool`."""
+
+    async def getconn(self, timeout: Optional[float] = None):
+        t0 = time.perf_counter()
+        conn = await super().getconn(timeout)
+        metrics.observe("postgres.pool_wait_ms", (time.perf_counter() - t0) * 1000)
+        return conn
+
+
+@contextmanager
+def postgres_store(
+    conn_string: str = POSTGRES_URI,
+    min_size: int = POSTGRES_POOL_MIN,
+    max_size: int = POSTGRES_POOL_MAX,
+    name: str = "store",
+) -> Iterator[PostgresStore]:
+    """
+    PostgresStore backed by a connection pool instead of one shared
+    connection, so concurrent conversations (and memory-worker jobs) don't
+    queue behind each other.
+    """
+    pool = TimedConnectionPool(conn_string, **_pool_kwargs(name, min_size, max_size))
+    pool.open(wait=True)
+    _register(pool)
+    logger.info("Postgres pool %r open (min=%d, max=%d)", name, min_size, max_size)
+    try:
+        yield PostgresStore(conn=pool)
+    finally:
+        pool.close()
+
+
+@asynccontextmanager
+async def apostgres_store(
+    conn_string: str = POSTGRES_URI,
+    min_size: int = POSTGRES_POOL_MIN,
+    max_size: int = POSTGRES_POOL_MAX,
+    name: str = "astore",
+) -> AsyncIterator[AsyncPostgresStore]:
+    """Async version of `postgres_store` (pool opened in the running loop)."""
+    pool = AsyncTimedConnectionPool(
+        conn_string, **_pool_kwargs(name, min_size, max_size)
+    )
+    await pool.open(wait=True)
+    _register(pool)
+    logger.info("Postgres pool %r open (min=%d, max=%d)", name, min_size, max_size)
+    try:
+        yield AsyncPostgresStore(conn=pool)
+    finally:
+        await pool.close()
@@ -0,0 +1,215 @@
+# app/graph/retention.py
+"""
+Checkpoint retention for the Redis checkpointer.
+
+Idle threads expire through the saver's own TTL (CHECKPOINT_TTL_MINUTES,
+refreshed whenever a thread is read), and CHECKPOINT_MODE=shallow stores only
+the latest state of each thread. The compaction job trims full-history
+threads to their newest CHECKPOINT_KEEP_LAST checkpoints, gives keys written
+before a TTL was configured one, and reports the memory it reclaimed:
+
+    python -m app.graph.retention --interval 3600
+"""
+
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import typer
+from langgraph.checkpoint.redis.base import CHECKPOINT_PREFIX, CHECKPOINT_WRITE_PREFIX
+from langgraph.checkpoint.redis.key_registry import WRITE_KEYS_ZSET_PREFIX
+from langgraph.checkpoint.redis.util import from_storage_safe_id
+
+from app.config import (
+    CHECKPOINT_COMPACT_INTERVAL,
+    CHECKPOINT_KEEP_LAST,
+    CHECKPOINT_TTL_MINUTES,
+    REDIS_URI,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Key families of one thread: "<prefix>:<thread_id>:..."
+_PREFIXES = (
+    CHECKPOINT_PREFIX,
+    f"{CHECKPOINT_PREFIX}_latest",
+    CHECKPOINT_WRITE_PREFIX,
+    WRITE_KEYS_ZSET_PREFIX,
+)
+
+
+def checkpoint_ttl(minutes: int = CHECKPOINT_TTL_MINUTES) -> Optional[dict]:
+    """`ttl` argument of the Redis savers (None keeps checkpoints forever)."""
+    if minutes <= 0:
+        return None
+    return {"default_ttl": minutes, "refresh_on_read": True}
+
+
+@dataclass
+class CompactionReport:
+    threads: int = 0
+    pruned_threads: int = 0
+    keys_deleted: int = 0
+    bytes_reclaimed: int = 0
+    ttl_applied: int = 0
+    used_memory_before: int = 0
+    used_memory_after: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.threads} threads, {self.pruned_threads} pruned, "
+            f"{self.keys_deleted} keys / {self.bytes_reclaimed / 1024:.1f} KiB reclaimed, "
+            f"TTL set on {self.ttl_applied} keys, used_memory "
+            f"{self.used_memory_before / 2**20:.1f} → "
+            f"{self.used_memory_after / 2**20:.1f} MiB in {self.seconds:.1f}s"
+        )
+
+
+# helpers
+def _decode(key) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def _scan(client, prefix: str, count: int) -> Iterable[str]:
+    for key in client.scan_iter(match=f"{prefix}:*", count=count):
+        yield _decode(key)
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _count_checkpoints(client, batch: int) -> Dict[Tuple[str, str], int]:
+    """Checkpoints per (thread, namespace)."""
+    counts: Dict[Tuple[str, str], int] = defaultdict(int)
+    for key in _scan(client, CHECKPOINT_PREFIX, batch):
+        parts = key.split(":")
+        if len(parts) >= 3:
+            counts[(parts[1], parts[2])] += 1
+    return counts
+
+
+def _thread_keys(client, threads: Set[str], batch: int) -> List[str]:
+    keys = []
+    for prefix in _PREFIXES:
+        keys.extend(
+            key for key in _scan(client, prefix, batch) if key.split(":")[1] in threads
+        )
+    return keys
+
+
+def _memory_usage(client, keys: List[str], batch: int) -> Dict[str, int]:
+    usage = {}
+    for chunk in _chunks(keys, batch):
+        pipe = client.pipeline(transaction=False)
+        for key in chunk:
+            pipe.memory_usage(key)
+        usage.update(zip(chunk, (n or 0 for n in pipe.execute())))
+    return usage
+
+
+def _deleted(client, keys: List[str], batch: int) -> List[str]:
+    gone = []
+    for chunk in _chunks(keys, batch):
+        pipe = client.pipeline(transaction=False)
+        for key in chunk:
+            pipe.exists(key)
+        gone.extend(key for key, n in zip(chunk, pipe.execute()) if not n)
+    return gone
+
+
+def _apply_ttl(client, seconds: int, batch: int) -> int:
+    """EXPIRE checkpoint keys that have none (written before TTLs were on)."""
+    applied = 0
+    for prefix in _PREFIXES:
+        keys = list(_scan(client, prefix, batch))
+        for chunk in _chunks(keys, batch):
+            pipe = client.pipeline(transaction=False)
+            for key in chunk:
+                pipe.ttl(key)
+            persistent = [key for key, ttl in zip(chunk, pipe.execute()) if ttl == -1]
+            if persistent:
+                pipe = client.pipeline(transaction=False)
+                for key in persistent:
+                    pipe.expire(key, seconds)
+                pipe.execute()
+                applied += len(persistent)
+    return applied
+
+
+def compact(
+    saver,
+    keep_last: int = CHECKPOINT_KEEP_LAST,
+    ttl_minutes: int = CHECKPOINT_TTL_MINUTES,
+    batch: int = 500,
+) -> CompactionReport:
+    """
+    One compaction pass over all threads of `saver` (a sync Redis saver).
+
+    Threads with more than `keep_last` checkpoints in a namespace are pruned
+    with the saver's own `prune` (checkpoints, their writes and registry
+    entries); the reclaimed bytes are the MEMORY USAGE of the keys that were
+    actually deleted. Redis's used_memory before / after is reported too.
+    """
+    client = saver._redis
+    t0 = time.perf_counter()
+    report = CompactionReport(used_memory_before=client.info("memory")["used_memory"])
+
+    counts = _count_checkpoints(client, batch)
+    report.threads = len({thread for thread, _ in counts})
+    if keep_last > 0:
+        over = {thread for (thread, _), n in counts.items() if n > keep_last}
+        if over:
+            keys = _thread_keys(client, over, batch)
+            usage = _memory_usage(client, keys, batch)
+            for thread in over:
+                saver.prune([from_storage_safe_id(thread)], keep_last=keep_last)
+            gone = _deleted(client, keys, batch)
+            report.pruned_threads = len(over)
+            report.keys_deleted = len(gone)
+            report.bytes_reclaimed = sum(usage[key] for key in gone)
+
+    if ttl_minutes > 0:
+        report.ttl_applied = _apply_ttl(client, ttl_minutes * 60, batch)
+
+    report.used_memory_after = client.info("memory")["used_memory"]
+    report.seconds = time.perf_counter() - t0
+    metrics.incr("checkpoints.compactions")
+    metrics.incr("checkpoints.keys_deleted", report.keys_deleted)
+    metrics.incr("checkpoints.bytes_reclaimed", report.bytes_reclaimed)
+    logger.info("Checkpoint compaction: %s", report)
+    return report
+
+
+def main(
+    interval: int = typer.Option(
+        CHECKPOINT_COMPACT_INTERVAL, help="Seconds between passes (0 = run once)."
+    ),
+    keep_last: int = typer.Option(
+        CHECKPOINT_KEEP_LAST, help="Checkpoints kept per thread (0 = all)."
+    ),
+):
+    """Prune old checkpoints and backfill TTLs, periodically or once."""
+    from app.graph.checkpoint_serde import redis_saver_class
+
+    logging.basicConfig(level=logging.INFO)
+    saver_class = redis_saver_class()
+    with saver_class.from_conn_string(REDIS_URI, ttl=checkpoint_ttl()) as saver:
+        saver.setup()
+        try:
+            while True:
+                typer.echo(str(compact(saver, keep_last)))
+                if interval <= 0:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            typer.secho("Checkpoint compaction stopped", fg=typer.colors.YELLOW)
+
+
+if __name__ == "__main__":
+    typer.run(main)
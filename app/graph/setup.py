@@ -0,0 +1,78 @@
+# app/graph/setup.py
+"""
+Schema setup of the Postgres store (its migrations) and the Redis
+checkpoint indices, meant to run once per deployment:
+
+    python -m app.graph.setup
+
+With GRAPH_SETUP=auto `build_graph` only runs the store migrations when no
+process of this deployment has done so yet for the installed
+langgraph-checkpoint-postgres version. (`RedisSaver.setup()` still runs in
+every process: besides creating missing indices it initialises per-client
+state the saver needs.)
+"""
+
+import logging
+import time
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional
+
+import typer
+
+from app.config import GRAPH_SETUP, POSTGRES_URI, REDIS_URI
+
+logger = logging.getLogger(__name__)
+
+
+def _setup_marker() -> str:
+    try:
+        return "pa:store_setup:" + version("langgraph-checkpoint-postgres")
+    except PackageNotFoundError:
+        return "pa:store_setup"
+
+
+def _redis():
+    import redis
+
+    return redis.Redis.from_url(REDIS_URI)
+
+
+def setup_needed(mode: Optional[str] = None) -> bool:
+    """
+    Whether this process must run the store migrations.
+
+    "always" / "never" are explicit; "auto" skips it when the marker left by
+    `mark_setup_done` is in Redis.
+    """
+    mode = mode or GRAPH_SETUP
+    if mode in ("always", "never"):
+        return mode == "always"
+    try:
+        return not _redis().exists(_setup_marker())
+    except Exception as e:
+        logger.warning("Could not read the setup marker (%s); running setup", e)
+        return True
+
+
+def mark_setup_done() -> None:
+    try:
+        _redis().set(_setup_marker(), int(time.time()))
+    except Exception as e:
+        logger.warning("Could not record the setup marker: %s", e)
+
+
+def main():
+    """Create the Redis checkpoint indices and run the Postgres store migrations."""
+    from langgraph.checkpoint.redis import RedisSaver
+    from langgraph.store.postgres import PostgresStore
+
+    with RedisSaver.from_conn_string(REDIS_URI) as saver:
+        saver.setup()
+    with PostgresStore.from_conn_string(POSTGRES_URI) as store:
+        store.setup()
+    mark_setup_done()
+    typer.secho("Checkpointer and store are set up", fg=typer.colors.GREEN)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,64 @@
+# app/graph/tokens.py
+
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Iterable
+
+from app.config import MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+# Fixed cost OpenAI adds per chat message (role, separators)
+MESSAGE_OVERHEAD = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for `model`, or None when it can't be loaded."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed; estimating tokens as chars / 4")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The BPE file is downloaded on first use; offline hosts fall back
+        logger.warning("tiktoken encoding unavailable (%s); estimating tokens", e)
+        return None
+
+
+def count_tokens(text: str, model: str = MODEL_NAME) -> int:
+    """Number of tokens `text` takes for `model` (chars / 4 without tiktoken)."""
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        content = message.get("content", "")
+        tool_calls = message.get("tool_calls") or []
+    else:
+        content = getattr(message, "content", "")
+        tool_calls = getattr(message, "tool_calls", None) or []
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    if tool_calls:
+        content += json.dumps(
+            [{"name": c["name"], "args": c["args"]} for c in tool_calls], default=str
+        )
+    return content
+
+
+def count_message_tokens(messages: Iterable[Any], model: str = MODEL_NAME) -> int:
+    """Approximate prompt tokens of a chat message list (content + tool calls)."""
+    return sum(
+        count_tokens(_message_text(m), model) + MESSAGE_OVERHEAD for m in messages
+    )
@@ -0,0 +1,89 @@
+# app/graph/tool_registry.py
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+logger = logging.getLogger(__name__)
+
+
+class ToolRegistry:
+    """
+    Compile the tool set once and hand out the result on every turn.
+
+    Holds the serialized OpenAI tool schemas, the model bound to them and an
+    O(1) tool-name → tool lookup used by the dispatcher. The MCP tool set is
+    the only part that can change at runtime, so the registry is versioned on
+    the names of the MCP tools and only rebuilds when they differ from the
+    last build. Nothing is built (and the MCP servers are not contacted)
+    until the first `refresh()`.
+    """
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        tools: Sequence[BaseTool],
+        mcp_tools: Callable[[], Sequence[BaseTool]],
+        memory_schemas: Sequence[type],
+    ):
+        self._model = model
+        self._static_tools = list(tools)
+        self._mcp_tools = mcp_tools
+        self._memory_schemas = list(memory_schemas)
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[tuple[str, ...]] = None
+
+        self.version = 0
+        self.tools: List[BaseTool] = []
+        self.schemas: List[Dict[str, Any]] = []
+        self.by_name: Dict[str, BaseTool] = {}
+        self.bound_model: Optional[Runnable] = None
+
+    def set_mcp_source(self, mcp_tools: Callable[[], Sequence[BaseTool]]) -> None:
+        """Take the MCP tools from `mcp_tools` from the next `refresh()` on."""
+        with self._lock:
+            self._mcp_tools = mcp_tools
+            self._fingerprint = None
+
+    def refresh(self) -> bool:
+        """Rebuild if the MCP tool set changed. Returns True when rebuilt."""
+        # Sorted so the schemas (part of the cached prompt prefix) come out
+        # byte-identical however the MCP server lists its tools
+        mcp = sorted(self._mcp_tools(), key=lambda t: t.name)
+        fingerprint = tuple(t.name for t in mcp)
+        if fingerprint == self._fingerprint:
+            return False
+
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return False
+
+            tools = [*self._static_tools, *mcp]
+            schemas = [
+                convert_to_openai_tool(t) for t in [*tools, *self._memory_schemas]
+            ]
+            bound = self._model.bind_tools(schemas, parallel_tool_calls=True)
+            by_name = {t.name: t for t in tools}
+
+            # Publish the new build only once it is complete
+            self.tools, self.schemas, self.by_name = tools, schemas, by_name
+            self.bound_model = bound
+            self._fingerprint = fingerprint
+            self.version += 1
+
+        logger.info(
+            "Tool registry v%d built: %d tools (%d from MCP)",
+            self.version,
+            len(schemas),
+            len(mcp),
+        )
+        return True
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        """Tool registered under `name`, if any (memory schemas are not tools)."""
+        return self.by_name.get(name)
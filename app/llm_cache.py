@@ -0,0 +1,329 @@
+# app/llm_cache.py
+
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Same loader LangChain's own caches use
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+# Message fields that differ between otherwise identical prompts
+_VOLATILE = ("id", "response_metadata", "usage_metadata")
+
+
+# helpers
+def _sha(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _normalize(prompt: str) -> List[dict]:
+    """The serialized messages without ids / provider metadata, content stripped."""
+    messages = json.loads(prompt)
+    for m in messages:
+        kwargs = m.get("kwargs", {}) if isinstance(m, dict) else {}
+        for field in _VOLATILE:
+            kwargs.pop(field, None)
+        if isinstance(kwargs.get("content"), str):
+            kwargs["content"] = kwargs["content"].strip()
+    return messages
+
+
+def _text(message: dict) -> str:
+    content = message.get("kwargs", {}).get("content", "")
+    if isinstance(content, str):
+        return content
+    return " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+
+
+def _is_human(message: dict) -> bool:
+    kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+    return kwargs.get("type") == "human"
+
+
+def _question(messages: List[dict]) -> Optional[int]:
+    """Index of the last human message (the stable layout puts context after it)."""
+    for i in range(len(messages) - 1, -1, -1):
+        if _is_human(messages[i]):
+            return i
+    return None
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SQLiteResponseStore:
+    """
+    Cached responses in one SQLite file: expired after `ttl` seconds, and the
+    least recently used rows evicted beyond `max_entries`.
+    """
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, grp TEXT, value TEXT, vector TEXT,"
+                " created REAL, used REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_grp ON responses(grp)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_used ON responses(used)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and row[1] < now - self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, value: str, group: str, vector: Optional[List[float]]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, group, value, json.dumps(vector) if vector else None, now, now),
+            )
+            if self.ttl:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.ttl,)
+                )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def candidates(self, group: str) -> List[Tuple[str, List[float]]]:
+        """(key, vector) of the live entries of `group` that have a vector."""
+        cutoff = time.time() - self.ttl if self.ttl else 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, vector FROM responses"
+                " WHERE grp = ? AND vector IS NOT NULL AND created >= ?",
+                (group, cutoff),
+            ).fetchall()
+        return [(key, json.loads(vector)) for key, vector in rows]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+class RedisResponseStore:
+    """
+    Same interface on Redis: values expire with the key TTL, a sorted set of
+    last-use times drives LRU eviction beyond `max_entries`, and each
+    group's vectors live in a hash (stale fields are dropped when read).
+    """
+
+    KEY_PREFIX = "pa:llm_cache:"
+
+    def __init__(self, redis_url: str, ttl: int, max_entries: int):
+        self._redis_url = redis_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    def _lru(self) -> str:
+        return self.KEY_PREFIX + "lru"
+
+    def _vectors(self, group: str) -> str:
+        return self.KEY_PREFIX + "vec:" + group
+
+    def get(self, key: str) -> Optional[str]:
+        raw = self.client.get(self.KEY_PREFIX + key)
+        if raw is None:
+            return None
+        self.client.zadd(self._lru(), {key: time.time()})
+        return raw.decode("utf-8")
+
+    def put(self, key: str, value: str, group: str, vector: Optional[List[float]]) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.KEY_PREFIX + key, value, ex=self.ttl or None)
+        pipe.zadd(self._lru(), {key: time.time()})
+        if vector:
+            pipe.hset(self._vectors(group), key, json.dumps(vector))
+            if self.ttl:
+                pipe.expire(self._vectors(group), self.ttl)
+        pipe.zcard(self._lru())
+        count = pipe.execute()[-1]
+        if count > self.max_entries:
+            popped = self.client.zpopmin(self._lru(), count - self.max_entries)
+            self.client.delete(*(self.KEY_PREFIX + k.decode() for k, _ in popped))
+
+    def candidates(self, group: str) -> List[Tuple[str, List[float]]]:
+        entries = self.client.hgetall(self._vectors(group))
+        if not entries:
+            return []
+        keys = [k.decode() for k in entries]
+        alive = self.client.mget([self.KEY_PREFIX + k for k in keys])
+        stale = [k for k, v in zip(keys, alive) if v is None]
+        if stale:
+            self.client.hdel(self._vectors(group), *stale)
+        return [
+            (k, json.loads(entries[k.encode()]))
+            for k, v in zip(keys, alive)
+            if v is not None
+        ]
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.KEY_PREFIX + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def make_response_store(
+    backend: str, path: str, redis_url: str, ttl: int, max_entries: int
+):
+    if backend == "redis":
+        return RedisResponseStore(redis_url, ttl, max_entries)
+    if backend == "sqlite":
+        return SQLiteResponseStore(path, ttl, max_entries)
+    raise ValueError(f"Unknown LLM cache backend {backend!r}")
+
+
+class ResponseCache(BaseCache):
+    """
+    LangChain chat-model cache for one model tier.
+
+    "exact" mode keys a response by a hash of the model parameters and the
+    normalized messages (without message ids and provider metadata).
+    "semantic" mode also answers a miss with a cached response whose last
+    human message embeds within `similarity` (cosine) of the new one, as long
+    as every other message (including a memory context placed after the
+    question) and the parameters are identical, so only near-duplicate
+    questions in the same context match. Hits, semantic hits
+    and misses are counted under `llm_cache.<tier>.*`.
+    """
+
+    def __init__(
+        self,
+        store,
+        tier: str,
+        mode: str = "exact",
+        similarity: float = 0.95,
+        embed: Optional[Callable[[str], List[float]]] = None,
+    ):
+        if mode not in ("exact", "semantic"):
+            raise ValueError(f"Unknown LLM cache mode {mode!r}")
+        self.store = store
+        self.tier = tier
+        self.semantic = mode == "semantic" and embed is not None
+        self.similarity = similarity
+        self._embed = embed
+        # Embedding of a missed prompt, reused when its response is stored
+        self._pending: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _keys(
+        self, prompt: str, llm_string: str
+    ) -> Tuple[str, str, Optional[dict]]:
+        """(exact key, group of the semantic candidates, message to embed)."""
+        messages = _normalize(prompt)
+        exact = _sha(llm_string, json.dumps(messages, sort_keys=True))
+        i = _question(messages)
+        if i is None:
+            i = len(messages) - 1
+        context = messages[:i] + messages[i + 1 :]
+        group = _sha(self.tier, llm_string, json.dumps(context, sort_keys=True))
+        return exact, group, messages[i] if messages else None
+
+    def _load(self, raw: str):
+        generations = loads(raw, allowed_objects="core")
+        for g in generations:
+            message = getattr(g, "message", None)
+            if message is not None:
+                # Nothing was billed for this response
+                g.message = message.model_copy(update={"usage_metadata": None})
+        return generations
+
+    def _nearest(self, group: str, vector: List[float]) -> Optional[str]:
+        best, best_key = self.similarity, None
+        for key, other in self.store.candidates(group):
+            score = _cosine(vector, other)
+            if score >= best:
+                best, best_key = score, key
+        return best_key
+
+    def lookup(self, prompt: str, llm_string: str):
+        try:
+            exact, group, question = self._keys(prompt, llm_string)
+            raw = self.store.get(exact)
+            if raw is None and self.semantic and question is not None:
+                vector = self._embed(_text(question))
+                with self._lock:
+                    self._pending[exact] = vector
+                    while len(self._pending) > 256:
+                        self._pending.popitem(last=False)
+                nearest = self._nearest(group, vector)
+                if nearest is not None:
+                    raw = self.store.get(nearest)
+                    if raw is not None:
+                        metrics.incr(f"llm_cache.{self.tier}.semantic_hits")
+            if raw is None:
+                metrics.incr(f"llm_cache.{self.tier}.misses")
+                return None
+            metrics.incr(f"llm_cache.{self.tier}.hits")
+            return self._load(raw)
+        except Exception as e:
+            logger.warning("LLM cache lookup failed (%s); calling the model", e)
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        try:
+            exact, group, _ = self._keys(prompt, llm_string)
+            with self._lock:
+                vector = self._pending.pop(exact, None)
+            self.store.put(exact, dumps(list(return_val)), group, vector)
+        except Exception as e:
+            logger.warning("LLM cache update failed: %s", e)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
@@ -0,0 +1,329 @@
+# app/llm_limits.py
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """The model failed too often in a row; calls fail fast until the cooldown ends."""
+
+
+# helpers
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue
+    return None
+
+
+class TokenBucket:
+    """
+    In-process token bucket refilled at `per_minute`, holding up to a
+    minute's worth.
+
+    `reserve(cost)` always takes the tokens, possibly into debt, and returns
+    how long the caller must wait before its share is actually there, so
+    waiting callers are served in arrival order instead of racing each other.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+            self._ts = now
+            self._tokens -= cost
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, negative, charge) the difference to an estimate."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RedisTokenBucket:
+    """Same bucket kept in Redis, so every worker process shares the budget."""
+
+    # KEYS[1] = bucket; ARGV = rate per second, capacity, cost (negative refunds)
+    _SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - cost
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+    if tokens >= 0 then return '0' end
+    return tostring(-tokens / rate)
+    """
+
+    def __init__(self, client, key: str, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.key = key
+        self._script = client.register_script(self._SCRIPT)
+
+    def reserve(self, cost: float) -> float:
+        return float(self._script(keys=[self.key], args=[self.rate, self.capacity, cost]))
+
+    def refund(self, amount: float) -> None:
+        self.reserve(-amount)
+
+
+class RateLimiter:
+    """
+    Client-side limits of one model: requests and tokens per minute (0 =
+    unlimited), plus a shared pause set when the API answers 429 with
+    Retry-After, so every caller backs off instead of each one finding out
+    with its own failed request. With a Redis client the buckets and the
+    pause are shared by all processes.
+    """
+
+    KEY_PREFIX = "pa:ratelimit:"
+
+    def __init__(self, model: str, rpm: int = 0, tpm: int = 0, client=None):
+        self.model = model
+        self._client = client
+        self._pause_until = 0.0
+        self._buckets: Dict[str, Any] = {}
+        for kind, per_minute in (("requests", rpm), ("tokens", tpm)):
+            if per_minute > 0:
+                if client is None:
+                    self._buckets[kind] = TokenBucket(per_minute)
+                else:
+                    key = f"{self.KEY_PREFIX}{model}:{kind}"
+                    self._buckets[kind] = RedisTokenBucket(client, key, per_minute)
+
+    def _pause_key(self) -> str:
+        return f"{self.KEY_PREFIX}{self.model}:pause_until"
+
+    def pause(self, seconds: float) -> None:
+        until = time.time() + seconds
+        if self._client is not None:
+            # Only ever moves forward
+            current = float(self._client.get(self._pause_key()) or 0)
+            if until > current:
+                self._client.set(self._pause_key(), until, ex=max(1, int(seconds) + 1))
+        self._pause_until = max(self._pause_until, until)
+
+    def _paused_for(self) -> float:
+        until = self._pause_until
+        if self._client is not None:
+            until = max(until, float(self._client.get(self._pause_key()) or 0))
+        return max(0.0, until - time.time())
+
+    def reserve(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens; seconds to wait before sending."""
+        wait = self._paused_for()
+        if "requests" in self._buckets:
+            wait = max(wait, self._buckets["requests"].reserve(1))
+        if "tokens" in self._buckets:
+            wait = max(wait, self._buckets["tokens"].reserve(tokens))
+        return wait
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the real usage is known."""
+        if actual is not None and "tokens" in self._buckets:
+            self._buckets["tokens"].refund(estimated - actual)
+
+    def acquire(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            metrics.observe("llm.ratelimit_wait_ms", wait * 1000)
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        if self._client is None:
+            wait = self.reserve(tokens)
+        else:
+            wait = await asyncio.to_thread(self.reserve, tokens)
+        if wait > 0:
+            metrics.observe("llm.ratelimit_wait_ms", wait * 1000)
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive transient failures: calls then fail
+    fast with CircuitOpenError for `cooldown` seconds, after which one trial
+    call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, cooldown: float = 30.0):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before(self) -> bool:
+        """Raise while open; True when the caller got the half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                raise CircuitOpenError(
+                    f"{self.name}: {self._failures} consecutive failures, "
+                    f"not calling it for {self.cooldown:g}s"
+                )
+            self._trial = True  # half-open
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self._failures, self._opened_at, self._trial = 0, None, False
+
+    def release(self) -> None:
+        """Give the trial up without an outcome (e.g. the call was cancelled)."""
+        with self._lock:
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning("Circuit for %s opened", self.name)
+                    metrics.incr("llm.circuit_opened")
+                self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Retry transient errors with capped exponential backoff and full jitter;
+    a Retry-After from the server takes precedence (and pauses `limiter`
+    for everyone).
+    """
+
+    def __init__(
+        self,
+        transient: Tuple[Type[BaseException], ...],
+        tries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        retryable: Callable[[BaseException], bool] = lambda exc: True,
+    ):
+        if tries < 1:
+            raise ValueError(f"tries must be at least 1, got {tries}")
+        self.transient = transient
+        self.tries = tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+
+    def _should_retry(self, exc: BaseException) -> bool:
+        return isinstance(exc, self.transient) and self.retryable(exc)
+
+    def _delay(
+        self, attempt: int, exc: BaseException, limiter: Optional[RateLimiter]
+    ) -> float:
+        server = retry_after(exc)
+        if server is not None:
+            if limiter is not None:
+                limiter.pause(server)
+            return min(server, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _failed(self, name, attempt, exc, breaker, limiter) -> float:
+        """Record a failed attempt; the delay before the next, or re-raise."""
+        if not self._should_retry(exc):
+            if breaker is not None:
+                breaker.success()  # the service answered
+            raise exc
+        metrics.incr("llm.transient_errors")
+        if breaker is not None:
+            breaker.failure()
+        if attempt + 1 >= self.tries:
+            raise exc
+        delay = self._delay(attempt, exc, limiter)
+        metrics.incr("llm.retries")
+        logger.warning("%s failed (%s). Retrying in %.1fs …", name, exc, delay)
+        return delay
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        name: str = "call",
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[RateLimiter] = None,
+        tokens: int = 0,
+    ) -> Any:
+        for attempt in range(self.tries):
+            trial = breaker.before() if breaker is not None else False
+            settled = False
+            try:
+                if limiter is not None:
+                    limiter.acquire(tokens)
+                try:
+                    result = fn()
+                except Exception as exc:
+                    settled = True  # `_failed` records the outcome
+                    delay = self._failed(name, attempt, exc, breaker, limiter)
+                else:
+                    settled = True
+                    if breaker is not None:
+                        breaker.success()
+                    return result
+            finally:
+                # Interrupted, cancelled or the limiter failed: no outcome
+                if trial and not settled:
+                    breaker.release()
+            time.sleep(delay)
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        name: str = "call",
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[RateLimiter] = None,
+        tokens: int = 0,
+    ) -> Any:
+        for attempt in range(self.tries):
+            trial = breaker.before() if breaker is not None else False
+            settled = False
+            try:
+                if limiter is not None:
+                    await limiter.aacquire(tokens)
+                try:
+                    result = await fn()
+                except Exception as exc:
+                    settled = True
+                    delay = self._failed(name, attempt, exc, breaker, limiter)
+                else:
+                    settled = True
+                    if breaker is not None:
+                        breaker.success()
+                    return result
+            finally:
+                if trial and not settled:
+                    breaker.release()
+            await asyncio.sleep(delay)
@@ -2,40 +2,78 @@
 
 import asyncio
 import logging
+import threading
 from typing import List
 from langchain_core.tools import Tool
 
+from app.metrics import startup
+
 logger = logging.getLogger(__name__)
 
-# Start with an empty list
+# Filled by the first `get_mcp_tools()` / `aget_mcp_tools()`; importing the
+# package doesn't spawn the MCP servers.
 MCP: List[Tool] = []
 MCP_INITIALIZED = False
+_MCP_ATTEMPTED = False
 
+# Held for the whole first attempt, so concurrent callers wait for it instead
+# of returning the still empty list. The async path also takes `_INIT_LOCK`
+# (from a worker thread), which keeps a sync caller from connecting twice.
+_INIT_LOCK = threading.Lock()
+_AINIT_LOCK = asyncio.Lock()
 
-# Initialize MCP tools at import time
-def _initialize_mcp():
-    global MCP, MCP_INITIALIZED
-    if not MCP_INITIALIZED:
-        try:
-            logger.info("→ initializing MCP servers at import time…")
-            # Create a new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
 
-            from app.mcp.manager import initialize_mcp_tools
+def _loaded(tools: List[Tool]) -> None:
+    global MCP, MCP_INITIALIZED, _MCP_ATTEMPTED
+    MCP, MCP_INITIALIZED, _MCP_ATTEMPTED = tools, True, True
+    logger.info(f"→ loaded {len(MCP)} MCP tools: {[t.name for t in MCP]}")
+
 
-            MCP = loop.run_until_complete(initialize_mcp_tools())
+def _failed(e: Exception) -> None:
+    global MCP, MCP_INITIALIZED, _MCP_ATTEMPTED
+    logger.exception(f"→ MCP init failed: {e}")
+    MCP, MCP_INITIALIZED, _MCP_ATTEMPTED = [], False, True
 
-            MCP_INITIALIZED = True
-            logger.info(f"→ loaded {len(MCP)} MCP tools: {[t.name for t in MCP]}")
-        except Exception as e:
-            logger.exception(f"→ MCP init failed at import time: {e}")
-            MCP = []
-            MCP_INITIALIZED = False
 
+def _initialize_mcp():
+    try:
+        logger.info("→ initializing MCP servers…")
+        from app.mcp.manager import initialize_mcp_tools, mcp_manager
 
-# Initialize at import time
-_initialize_mcp()
+        # Connect on the manager's own loop thread, which then serves
+        # every sync tool call (from any dispatcher thread)
+        _loaded(mcp_manager.run(initialize_mcp_tools()))
+    except Exception as e:
+        _failed(e)
+
+
+def get_mcp_tools() -> List[Tool]:
+    """MCP tools, connecting to the servers on first use (tried once)."""
+    if not _MCP_ATTEMPTED:
+        with _INIT_LOCK:
+            if not _MCP_ATTEMPTED:
+                with startup.phase("mcp"):
+                    _initialize_mcp()
+    return MCP
+
+
+async def aget_mcp_tools() -> List[Tool]:
+    """Async `get_mcp_tools`, connecting inside the running event loop."""
+    if not _MCP_ATTEMPTED:
+        async with _AINIT_LOCK:
+            await asyncio.to_thread(_INIT_LOCK.acquire)
+            try:
+                if not _MCP_ATTEMPTED:
+                    with startup.phase("mcp"):
+                        try:
+                            from app.mcp.manager import initialize_mcp_tools
+
+                            _loaded(await initialize_mcp_tools())
+                        except Exception as e:
+                            _failed(e)
+            finally:
+                _INIT_LOCK.release()
+    return MCP
 
 
 async def cleanup_mcp():
@@ -51,4 +89,4 @@ async def cleanup_mcp():
         logger.exception(f"Error during MCP cleanup: {e}")
 
 
-__all__ = ["MCP", "cleanup_mcp"]
+__all__ = ["MCP", "get_mcp_tools", "aget_mcp_tools", "cleanup_mcp"]
@@ -2,6 +2,7 @@
 
 import logging
 import asyncio
+import threading
 from typing import Dict, List, Optional
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_core.tools import StructuredTool, Tool
@@ -31,7 +32,9 @@ class MCPManager:
         self.client = None
         self._tools: List[Tool] = []
         self._initialized = True
-        self._loop = None  # Store a reference to the event loop
+        self._loop = None  # The event loop that owns the MCP sessions
+        self._thread: Optional[threading.Thread] = None  # runs it in sync mode
+        self._loop_lock = threading.Lock()
 
         logger.debug(f"Initialized MCPManager with {len(self._config)} servers")
 
@@ -43,12 +46,8 @@ class MCPManager:
 
         try:
             logger.info(f"Connecting to {len(self._config)} MCP servers...")
-            # Get the current event loop or create a new one
-            try:
-                self._loop = asyncio.get_event_loop()
-            except RuntimeError:
-                self._loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self._loop)
+            # The sessions are bound to the loop they are opened on
+            self._loop = asyncio.get_running_loop()
 
             # Create the client and enter the context
             client = MultiServerMCPClient(self._config)
@@ -76,8 +75,46 @@ class MCPManager:
                 self._tools = []
             raise
 
+    def _running_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        The sessions' loop, running. In sync mode it runs forever on a
+        daemon thread, so tool calls from any number of threads are just
+        submitted to it (a loop can't be driven by two threads at once).
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+            starting = self._thread is not None and self._thread.is_alive()
+            if not self._loop.is_running() and not starting:
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="mcp-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        """Run `coro` on the sessions' loop from a thread outside it."""
+        loop = self._running_loop()
+        if self._thread is not None and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("MCP tools can't be called synchronously on the MCP loop")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
     async def disconnect(self) -> None:
         """Gracefully disconnect from all MCP servers."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self._loop
+        if self._thread is not None and loop is not None and running is not loop:
+            # The sessions belong to the MCP thread's loop: close them there
+            future = asyncio.run_coroutine_threadsafe(self._disconnect(), loop)
+            await asyncio.wrap_future(future)
+            return
+        await self._disconnect()
+
+    async def _disconnect(self) -> None:
         if not self.client:
             logger.info("No MCP client to disconnect")
             return
@@ -125,69 +162,23 @@ class MCPManager:
                     # Create a sync wrapper that runs the async function in a loop
                     async_func = tool.coroutine
 
-                    def create_sync_wrapper(async_fn):
+                    def create_sync_wrapper(async_fn, name):
                         def sync_wrapper(*args, **kwargs):
-                            """Run async function in a new event loop."""
+                            """Run the async tool on the MCP sessions' loop."""
                             try:
-                                # Use the manager's stored loop if available
-                                if self._loop and not self._loop.is_closed():
-                                    loop = self._loop
-                                else:
-                                    # Try to get the current event loop
-                                    try:
-                                        loop = asyncio.get_event_loop()
-                                    except RuntimeError:
-                                        # Create a new one if necessary
-                                        loop = asyncio.new_event_loop()
-                                        asyncio.set_event_loop(loop)
-                                        # Store the new loop reference
-                                        self._loop = loop
-
-                                # Use the appropriate API based on whether the loop is running
-                                if loop.is_running():
-                                    logger.debug(
-                                        f"Running async tool {tool.name} with run_coroutine_threadsafe"
-                                    )
-                                    future = asyncio.run_coroutine_threadsafe(
-                                        async_fn(*args, **kwargs), loop
-                                    )
-                                    return future.result()
-                                else:
-                                    logger.debug(
-                                        f"Running async tool {tool.name} with run_until_complete"
-                                    )
-                                    return loop.run_until_complete(
-                                        async_fn(*args, **kwargs)
-                                    )
-                            except RuntimeError as e:
-                                if "Event loop is closed" in str(e):
-                                    logger.warning(
-                                        f"Event loop was closed, creating a new one for tool {tool.name}"
-                                    )
-                                    # Create a new loop if the current one is closed
-                                    new_loop = asyncio.new_event_loop()
-                                    asyncio.set_event_loop(new_loop)
-                                    self._loop = new_loop
-                                    return new_loop.run_until_complete(
-                                        async_fn(*args, **kwargs)
-                                    )
-                                else:
-                                    logger.exception(
-                                        f"Runtime error executing async tool {tool.name}: {e}"
-                                    )
-                                    raise
+                                return self.run(async_fn(*args, **kwargs))
                             except Exception as e:
                                 logger.exception(
-                                    f"Error executing async tool {tool.name} in sync context: {e}"
+                                    f"Error executing async tool {name} in sync context: {e}"
                                 )
                                 raise RuntimeError(
-                                    f"Failed to execute tool {tool.name}: {str(e)}"
+                                    f"Failed to execute tool {name}: {str(e)}"
                                 )
 
                         return sync_wrapper
 
                     # Create and assign the wrapper
-                    tool.func = create_sync_wrapper(async_func)
+                    tool.func = create_sync_wrapper(async_func, tool.name)
 
             prepared_tools.append(tool)
 
@@ -0,0 +1,104 @@
+# app/metrics.py
+
+import threading
+import time
+from contextlib import contextmanager
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterator
+
+
+class Metrics:
+    """
+    Process-wide counters and observations (latencies, token counts, …).
+
+    Observations keep a bounded window of recent values so percentiles stay
+    cheap; counters are plain running totals; gauges are callables read at
+    snapshot time (e.g. connection-pool state). `snapshot()` is what the
+    CLI's `/stats` command prints.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._observations: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, list] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            if name not in self._observations:
+                self._observations[name] = deque(maxlen=self._window)
+                self._totals[name] = [0, 0.0]
+            self._observations[name].append(value)
+            self._totals[name][0] += 1
+            self._totals[name][1] += value
+
+    def gauge(self, name: str, read: Callable[[], Any]) -> None:
+        """Report `read()` under `name` in every snapshot."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            summaries = {}
+            for name, values in self._observations.items():
+                ordered = sorted(values)
+                count, total = self._totals[name]
+                summaries[name] = {
+                    "count": count,
+                    "avg": total / count,
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1],
+                }
+            counters, gauges = dict(self._counters), dict(self._gauges)
+        return {
+            "counters": counters,
+            "observations": summaries,
+            "gauges": {name: read() for name, read in gauges.items()},
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+            self._totals.clear()
+
+
+metrics = Metrics()
+
+
+class StartupTimer:
+    """Wall time of each cold-start phase (imports, connections, setup, MCP, …)."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        metrics.observe(f"startup.{name}_ms", seconds * 1000)
+
+    def report(self) -> str:
+        total = sum(self.phases.values())
+        parts = ", ".join(f"{n} {s * 1000:.0f}ms" for n, s in self.phases.items())
+        return f"startup {total * 1000:.0f}ms ({parts})"
+
+
+startup = StartupTimer()
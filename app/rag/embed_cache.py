@@ -0,0 +1,209 @@
+# app/rag/embed_cache.py
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# helpers
+def _pack(vector: Sequence[float]) -> bytes:
+    # float32, the precision the embeddings API returns
+    return array("f", vector).tobytes()
+
+
+def _unpack(raw: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(raw)
+    return vector.tolist()
+
+
+class SQLiteEmbeddingStore:
+    """Vectors in one SQLite file, least recently used evicted beyond `max_entries`."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened on first use (callers hold `_lock`), not when the app imports
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " key TEXT PRIMARY KEY, vector BLOB, used REAL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings(used)"
+                )
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        with self._lock, self.conn:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                part = keys[i : i + 500]
+                marks = ",".join("?" * len(part))
+                found.update(
+                    self.conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({marks})",
+                        part,
+                    ).fetchall()
+                )
+                self.conn.execute(
+                    f"UPDATE embeddings SET used = ? WHERE key IN ({marks})",
+                    [time.time(), *part],
+                )
+        return found
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(key, raw, now) for key, raw in items.items()],
+            )
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM embeddings")
+
+
+class RedisEmbeddingStore:
+    """Same interface on Redis, with a sorted set of last-use times for LRU eviction."""
+
+    KEY_PREFIX = "pa:embed_cache:"
+
+    def __init__(self, redis_url: str, max_entries: int):
+        self._redis_url = redis_url
+        self.max_entries = max_entries
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    def _lru(self) -> str:
+        return self.KEY_PREFIX + "lru"
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        values = self.client.mget([self.KEY_PREFIX + key for key in keys])
+        found = {key: raw for key, raw in zip(keys, values) if raw is not None}
+        if found:
+            now = time.time()
+            self.client.zadd(self._lru(), {key: now for key in found})
+        return found
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        if not items:
+            return
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.mset({self.KEY_PREFIX + key: raw for key, raw in items.items()})
+        pipe.zadd(self._lru(), {key: now for key in items})
+        pipe.zcard(self._lru())
+        count = pipe.execute()[-1]
+        if count > self.max_entries:
+            popped = self.client.zpopmin(self._lru(), count - self.max_entries)
+            self.client.delete(*(self.KEY_PREFIX + k.decode() for k, _ in popped))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.KEY_PREFIX + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def make_embedding_store(backend: str, path: str, redis_url: str, max_entries: int):
+    if backend == "redis":
+        return RedisEmbeddingStore(redis_url, max_entries)
+    if backend == "sqlite":
+        return SQLiteEmbeddingStore(path, max_entries)
+    raise ValueError(f"Unknown embedding cache backend {backend!r}")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that only call `inner` for texts it hasn't embedded before.
+
+    Vectors are keyed by (model, dimensions, sha256(text)), so re-indexing a
+    mostly unchanged document, or asking the same question again, costs
+    embedding calls for the new texts only (each distinct text once per
+    batch). Hits and misses are counted per distinct text under
+    `embed_cache.*`; if the store fails, everything is embedded as if it
+    were empty. The SQLite store is only opened on the first lookup.
+    """
+
+    def __init__(self, inner: Embeddings, store, model: str, dimensions: Optional[int]):
+        self.inner = inner
+        self.store = store
+        self._prefix = f"{model}:{dimensions or 'default'}:"
+
+    def _key(self, text: str) -> str:
+        return self._prefix + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        distinct = list(dict.fromkeys(keys))
+        try:
+            found = self.store.get_many(distinct)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed (%s); embedding everything", e)
+            found = {}
+        vectors: Dict[str, List[float]] = {k: _unpack(raw) for k, raw in found.items()}
+
+        missing = {k: t for k, t in zip(keys, texts) if k not in vectors}
+        metrics.incr("embed_cache.hits", len(distinct) - len(missing))
+        metrics.incr("embed_cache.misses", len(missing))
+        if missing:
+            fresh = self.inner.embed_documents(list(missing.values()))
+            vectors.update(zip(missing, fresh))
+            try:
+                self.store.put_many({k: _pack(vectors[k]) for k in missing})
+            except Exception as e:
+                logger.warning("Embedding cache update failed: %s", e)
+        return [vectors[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def cached_embeddings(
+    inner: Embeddings, backend: str, path: str, redis_url: str, max_entries: int
+) -> Embeddings:
+    """`inner` behind the embedding cache, or `inner` itself with backend "none"."""
+    if backend == "none":
+        return inner
+    store = make_embedding_store(backend, path, redis_url, max_entries)
+    model = getattr(inner, "model", type(inner).__name__)
+    return CachedEmbeddings(inner, store, model, getattr(inner, "dimensions", None))
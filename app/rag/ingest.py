@@ -0,0 +1,211 @@
+# app/rag/ingest.py
+"""
+Streaming ingestion: pages are loaded lazily, split one at a time and handed
+to the vector store in fixed-size batches, with a bounded number of batches
+in flight. When the store falls behind, the loader simply isn't read any
+further (backpressure), so peak memory depends on the batch settings rather
+than on the size of the document.
+
+Each in-flight batch is embedded with one request and upserted in
+UPSERT_BATCH_SIZE pieces by `VectorWriter`, so embedding some batches
+overlaps with upserting others. Simultaneous requests per service are
+capped process-wide (EMBED_CONCURRENCY, UPSERT_CONCURRENCY), however many
+ingestions run at once.
+"""
+
+import logging
+import resource
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from langchain_core.documents import Document
+
+from app.config import (
+    EMBED_CONCURRENCY,
+    INGEST_BATCH_SIZE,
+    INGEST_MAX_IN_FLIGHT,
+    INGEST_PROGRESS_SECONDS,
+    UPSERT_BATCH_SIZE,
+    UPSERT_CONCURRENCY,
+)
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Requests in flight per external service, shared by every ingestion
+_SLOTS: Dict[str, threading.BoundedSemaphore] = {
+    "embed": threading.BoundedSemaphore(EMBED_CONCURRENCY),
+    "upsert": threading.BoundedSemaphore(UPSERT_CONCURRENCY),
+}
+
+
+@dataclass
+class IngestStats:
+    pages: int = 0
+    chunks: int = 0
+    vectors: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+
+    def rate(self, count: int) -> float:
+        return count / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.pages} pages, {self.chunks} chunks, {self.vectors} vectors, "
+            f"{self.skipped} unchanged, {self.deleted} deleted "
+            f"in {self.seconds:.1f}s ({self.rate(self.pages):.1f} pages/s, "
+            f"{self.rate(self.chunks):.1f} chunks/s, "
+            f"{self.rate(self.vectors):.1f} vectors/s), "
+            f"peak RSS {self.peak_rss_mb:.0f} MiB"
+        )
+
+
+# helpers
+def peak_rss_mb() -> float:
+    """High-water mark of this process's resident memory."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return rss / (2**20 if sys.platform == "darwin" else 1024)
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _timed(service: str, fn: Callable[[], T]) -> T:
+    with _SLOTS[service]:
+        t0 = time.perf_counter()
+        result = fn()
+    metrics.observe(f"rag.{service}_ms", (time.perf_counter() - t0) * 1000)
+    return result
+
+
+class VectorWriter:
+    """
+    The `upsert` step of `ingest` for a raw vector index: embeds a batch of
+    chunks with one `embed(texts)` call, then writes the vectors (the
+    chunk's id or a random one, values, metadata with the text under
+    `text_key`) with `upsert(records)` calls of at most `upsert_batch`
+    records. `remove(ids)` deletes vectors through `delete`.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        upsert: Callable[[List[dict]], Any],
+        text_key: str = "page_content",
+        upsert_batch: int = UPSERT_BATCH_SIZE,
+        delete: Optional[Callable[[List[str]], Any]] = None,
+    ):
+        self.embed = embed
+        self.upsert = upsert
+        self.text_key = text_key
+        self.upsert_batch = upsert_batch
+        self.delete = delete
+
+    def __call__(self, chunks: List[Document]) -> int:
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = _timed("embed", lambda: self.embed(texts))
+        records = [
+            {
+                "id": chunk.id or str(uuid.uuid4()),
+                "values": vector,
+                "metadata": {**chunk.metadata, self.text_key: chunk.page_content},
+            }
+            for chunk, vector in zip(chunks, vectors)
+        ]
+        for part in batched(records, self.upsert_batch):
+            _timed("upsert", lambda: self.upsert(part))
+        return len(records)
+
+    def remove(self, ids: List[str]) -> int:
+        # Pinecone deletes at most 1000 ids per request
+        for part in batched(ids, 1000):
+            _timed("upsert", lambda: self.delete(part))
+        return len(ids)
+
+
+def ingest(
+    pages: Iterable[Document],
+    split: Callable[[Document], Iterable[Document]],
+    upsert: Callable[[List[Document]], int],
+    batch_size: int = INGEST_BATCH_SIZE,
+    max_in_flight: int = INGEST_MAX_IN_FLIGHT,
+    progress: Optional[Callable[[IngestStats], None]] = None,
+    progress_every: float = INGEST_PROGRESS_SECONDS,
+) -> IngestStats:
+    """
+    Split each of `pages` and pass the chunks, `batch_size` at a time, to
+    `upsert` (which returns the number of vectors it wrote) on up to
+    `max_in_flight` worker threads. A new batch is only built once a slot is
+    free. `progress` gets the running stats every `progress_every` seconds.
+    """
+    stats = IngestStats()
+    t0 = last = time.perf_counter()
+    pending: Deque[Future] = deque()
+
+    def chunks() -> Iterator[Document]:
+        for page in pages:
+            stats.pages += 1
+            for chunk in split(page):
+                stats.chunks += 1
+                yield chunk
+
+    def drain(limit: int) -> None:
+        while len(pending) > limit:
+            stats.vectors += pending.popleft().result()
+
+    def snapshot() -> IngestStats:
+        stats.seconds = time.perf_counter() - t0
+        stats.peak_rss_mb = peak_rss_mb()
+        return stats
+
+    with ThreadPoolExecutor(max_in_flight, thread_name_prefix="ingest") as pool:
+        try:
+            for batch in batched(chunks(), batch_size):
+                drain(max_in_flight - 1)
+                pending.append(pool.submit(upsert, batch))
+                if progress and time.perf_counter() - last >= progress_every:
+                    progress(snapshot())
+                    last = time.perf_counter()
+            drain(0)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    snapshot()
+    metrics.incr("rag.ingest.pages", stats.pages)
+    metrics.incr("rag.ingest.chunks", stats.chunks)
+    metrics.incr("rag.ingest.vectors", stats.vectors)
+    metrics.observe("rag.ingest.vectors_per_s", stats.rate(stats.vectors))
+    logger.info("Ingested %s", stats)
+    return stats
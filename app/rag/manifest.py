@@ -0,0 +1,179 @@
+# app/rag/manifest.py
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceRecord:
+    """What was last indexed from one source."""
+
+    source: str
+    hash: str
+    indexed_at: float
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+# helpers
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def source_key(path_or_url: str) -> str:
+    """Stable name of a source: URLs as given, local files by absolute path."""
+    if urlparse(path_or_url).scheme in ("http", "https"):
+        return path_or_url
+    return str(Path(path_or_url).resolve())
+
+
+def file_hash(path_or_url: str) -> Optional[str]:
+    """sha256 of a local file's bytes (None for URLs: known only once downloaded)."""
+    if urlparse(path_or_url).scheme in ("http", "https"):
+        return None
+    h = hashlib.sha256()
+    with open(path_or_url, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class SQLiteManifest:
+    """Source records in one SQLite file, one row per (index, source)."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " index_name TEXT, source TEXT, record TEXT,"
+                " PRIMARY KEY (index_name, source))"
+            )
+
+    def get(self, index: str, source: str) -> Optional[SourceRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM sources WHERE index_name = ? AND source = ?",
+                (index, source),
+            ).fetchone()
+        return SourceRecord(**json.loads(row[0])) if row else None
+
+    def put(self, index: str, record: SourceRecord) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                (index, record.source, json.dumps(asdict(record))),
+            )
+
+    def delete(self, index: str) -> None:
+        """Forget every source of `index` (it was deleted or recreated)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sources WHERE index_name = ?", (index,))
+
+
+class RedisManifest:
+    """Same interface on Redis: one hash per index, field = source."""
+
+    KEY_PREFIX = "pa:index_manifest:"
+
+    def __init__(self, redis_url: str):
+        self._redis_url = redis_url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._redis_url)
+        return self._client
+
+    def get(self, index: str, source: str) -> Optional[SourceRecord]:
+        raw = self.client.hget(self.KEY_PREFIX + index, source)
+        return SourceRecord(**json.loads(raw)) if raw else None
+
+    def put(self, index: str, record: SourceRecord) -> None:
+        self.client.hset(
+            self.KEY_PREFIX + index, record.source, json.dumps(asdict(record))
+        )
+
+    def delete(self, index: str) -> None:
+        self.client.delete(self.KEY_PREFIX + index)
+
+
+def make_manifest(backend: str, path: str, redis_url: str):
+    if backend == "redis":
+        return RedisManifest(redis_url)
+    if backend == "sqlite":
+        return SQLiteManifest(path)
+    raise ValueError(f"Unknown index manifest backend {backend!r}")
+
+
+class SourceSync:
+    """
+    Incremental re-indexing of one source against its previous record.
+
+    Chunks get deterministic ids, `<source digest>#<chunk digest>` over the
+    text and page number (with a counter for repeats), so upserting the same
+    chunk twice overwrites it. Chunks already indexed are skipped; the ones
+    the last run indexed but this one didn't produce are `removed()`.
+    """
+
+    def __init__(self, source: str, previous: Optional[SourceRecord] = None):
+        self.source = source
+        self.previous = previous
+        self._prefix = _sha(source)[:16] + "#"
+        self._known = set(previous.chunk_ids) if previous else set()
+        self._seen: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.skipped = 0
+
+    def chunk_id(self, chunk: Document) -> str:
+        # The page is part of the id so that citations stay right
+        digest = _sha(f"{chunk.metadata.get('page', '')}\0{chunk.page_content}")[:32]
+        n = self._seen.get(digest, 0)
+        self._seen[digest] = n + 1
+        return self._prefix + digest + (f"-{n}" if n else "")
+
+    def split(
+        self, split: Callable[[Document], Iterable[Document]]
+    ) -> Callable[[Document], Iterator[Document]]:
+        """`split`, with ids assigned and unchanged chunks left out."""
+
+        def new_chunks(page: Document) -> Iterator[Document]:
+            for chunk in split(page):
+                chunk.id = self.chunk_id(chunk)
+                self.ids.append(chunk.id)
+                if chunk.id in self._known:
+                    self.skipped += 1
+                    continue
+                yield chunk
+
+        return new_chunks
+
+    def removed(self) -> List[str]:
+        current = set(self.ids)
+        return [i for i in self._known if i not in current]
+
+    def record(self, hash: Optional[str] = None) -> SourceRecord:
+        """The new record; `hash` defaults to a digest of the chunk ids."""
+        return SourceRecord(
+            source=self.source,
+            hash=hash or _sha("\n".join(self.ids)),
+            indexed_at=time.time(),
+            chunk_ids=self.ids,
+        )
@@ -1,14 +1,28 @@
 # app/rag/pinecone.py
 
+import asyncio
 import logging
+import time
 from typing import Optional
 
 from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
-from .utils import load_docs, split_docs, get_store
+from .ingest import IngestStats, ingest
+from .manifest import SourceSync, file_hash, source_key
+from .utils import (
+    get_manifest,
+    get_store,
+    get_writer,
+    index_key,
+    invalidate_index,
+    is_not_found,
+    iter_docs,
+    split_doc,
+)
 from app.config import get_rag_llm
 
 logger = logging.getLogger(__name__)
@@ -23,6 +37,63 @@ _PROMPT = ChatPromptTemplate.from_messages([("system", _SYS), ("human", "{input}
 _COMBINE = create_stuff_documents_chain(llm=_LLM, prompt=_PROMPT)
 
 
+# helpers
+def _retrieval_chain(name: str):
+    store = get_store(name)
+    retriever = store.as_retriever(
+        # search_type="mmr",
+        search_type="similarity_score_threshold",
+        search_kwargs={"k": 20, "score_threshold": 0.15},
+        # search_kwargs={"k": k, "lambda_mult": 0.5},
+    )
+    return create_retrieval_chain(
+        retriever=retriever,
+        combine_docs_chain=_COMBINE,
+    )
+
+
+def _answer(result: dict) -> str:
+    answer = result.get("answer") or result.get("output") or ""
+
+    docs_raw = (
+        result.get("source_documents")
+        or result.get("documents")
+        or result.get("context")
+        or []
+    )
+
+    docs = docs_raw if isinstance(docs_raw, list) else docs_raw.get("documents", [])
+
+    cites = " ".join(f"(page {d.metadata.get('page', '?')})" for d in docs[:2])
+
+    return (
+        answer + (" " + cites if cites else "")
+        if answer
+        else "I couldn’t find that in the context."
+    )
+
+
+def _forget_if_gone(name: Optional[str], exc: BaseException) -> None:
+    if name and is_not_found(exc):
+        logger.warning("Index '%s' not found; dropping its cached client", name)
+        invalidate_index(name)
+
+
+def _progress(name: str):
+    """Log ingestion progress and send it to the client as a tool event."""
+    try:
+        write = get_stream_writer()
+    except RuntimeError:  # called outside a graph run
+        write = None
+
+    def report(stats: IngestStats) -> None:
+        logger.info("Indexing into '%s': %s", name, stats)
+        if write is not None:
+            write({"event": "tool_progress", "name": "index_docs", "text": str(stats)})
+
+    return report
+
+
 # LangGraph tools
 @tool
 def index_docs(name: Optional[str], path_or_url: str) -> str:
@@ -40,17 +111,37 @@ def index_docs(name: Optional[str], path_or_url: str) -> str:
         return "❓ Please provide a Pinecone index name."
 
     try:
-        docs = load_docs(path_or_url)
-        chunks = split_docs(docs)
-
-        store = get_store(name)
-        store.add_documents(chunks)
+        # Resolve the index first: creating it clears its manifest records
+        writer = get_writer(name)
+        index = index_key(name)
+        manifest = get_manifest()
+        source = source_key(path_or_url)
+        previous = manifest.get(index, source)
+        digest = file_hash(path_or_url)
+        if previous is not None and digest is not None and digest == previous.hash:
+            when = time.localtime(previous.indexed_at)
+            return (
+                f"'{path_or_url}' is unchanged since "
+                f"{time.strftime('%Y-%m-%d %H:%M', when)}; nothing to index."
+            )
+
+        sync = SourceSync(source, previous)
+        stats = ingest(
+            iter_docs(path_or_url),
+            sync.split(split_doc),
+            writer,
+            progress=_progress(name),
+        )
+        stats.skipped = sync.skipped
+        stats.deleted = writer.remove(sync.removed())
+        manifest.put(index, sync.record(digest))
 
-        logger.info("Indexed %s chunks into '%s'", len(chunks), name)
+        logger.info("Indexed %s chunks into '%s'", stats.chunks, name)
 
-        return f"Indexed {len(chunks)} chunks into '{name}'."
+        return f"Indexed {stats.chunks} new chunks into '{name}' ({stats})."
     except Exception as exc:
         logger.exception("index_docs failed")
+        _forget_if_gone(name, exc)
         return f"index_docs error: {exc}"
 
 
@@ -67,37 +158,26 @@ def query_index(name: str, question: str, k: int = 20) -> str:
       Answer string (may cite context implicitly).
     """
     try:
-        store = get_store(name)
-        retriever = store.as_retriever(
-            # search_type="mmr",
-            search_type="similarity_score_threshold",
-            search_kwargs={"k": 20, "score_threshold": 0.15},
-            # search_kwargs={"k": k, "lambda_mult": 0.5},
-        )
-        rag = create_retrieval_chain(
-            retriever=retriever,
-            combine_docs_chain=_COMBINE,
-        )
+        rag = _retrieval_chain(name)
         result = rag.invoke({"input": question}, return_source_documents=True)
+        return _answer(result)
+    except Exception as exc:
+        logger.exception("query_index failed")
+        _forget_if_gone(name, exc)
+        return f"query_index error: {exc}"
 
-        answer = result.get("answer") or result.get("output") or ""
-
-        docs_raw = (
-            result.get("source_documents")
-            or result.get("documents")
-            or result.get("context")
-            or []
-        )
-
-        docs = docs_raw if isinstance(docs_raw, list) else docs_raw.get("documents", [])
-
-        cites = " ".join(f"(page {d.metadata.get('page', '?')})" for d in docs[:2])
 
-        return (
-            answer + (" " + cites if cites else "")
-            if answer
-            else "I couldn’t find that in the context."
-        )
+async def _aquery_index(name: str, question: str, k: int = 20) -> str:
+    try:
+        # The first get_store of an index talks to the control plane synchronously
+        rag = await asyncio.to_thread(_retrieval_chain, name)
+        result = await rag.ainvoke({"input": question}, return_source_documents=True)
+        return _answer(result)
     except Exception as exc:
         logger.exception("query_index failed")
+        _forget_if_gone(name, exc)
         return f"query_index error: {exc}"
+
+
+# Native async implementation, used when the graph runs with ainvoke
+query_index.coroutine = _aquery_index
@@ -1,9 +1,9 @@
 # app/rag/utils.py
 
-import logging, time, tempfile, requests, re
+import logging, time, tempfile, threading, requests, re
 from pathlib import Path
 from urllib.parse import urlparse
-from typing import List
+from typing import Iterable, Iterator
 
 from pinecone import Pinecone, ServerlessSpec
 from langchain_openai import OpenAIEmbeddings
@@ -18,14 +18,42 @@ from langchain_community.document_loaders import (
     UnstructuredWordDocumentLoader,
 )
 
-from app.config import PINECONE_API_KEY, PINECONE_ENV
+from app.config import (
+    EMBED_CACHE_BACKEND,
+    EMBED_CACHE_MAX_ENTRIES,
+    EMBED_CACHE_PATH,
+    INDEX_MANIFEST_BACKEND,
+    INDEX_MANIFEST_PATH,
+    PINECONE_API_KEY,
+    PINECONE_ENV,
+    REDIS_URI,
+)
+from app.metrics import metrics
+from .embed_cache import cached_embeddings
+from .ingest import VectorWriter
+from .manifest import make_manifest
 
 # globals
 logger = logging.getLogger(__name__)
 
 _pc = Pinecone(api_key=PINECONE_API_KEY)
-_EMBED = OpenAIEmbeddings(model="text-embedding-3-small")
+# Only texts not embedded before reach the API (index_docs and query_index)
+_EMBED = cached_embeddings(
+    OpenAIEmbeddings(model="text-embedding-3-small"),
+    EMBED_CACHE_BACKEND,
+    EMBED_CACHE_PATH,
+    REDIS_URI,
+    EMBED_CACHE_MAX_ENTRIES,
+)
 _DIM = 1536
+TEXT_KEY = "page_content"
+_MANIFEST = None
+
+# Ready indexes by sanitized name: data-plane clients and vector stores
+_INDEXES: dict = {}
+_STORES: dict = {}
+_INDEX_LOCKS: dict = {}
+_INDEXES_LOCK = threading.Lock()
 
 _REGION_MAP = {
     "us-east1": "us-east-1",
@@ -33,49 +61,50 @@ _REGION_MAP = {
 }
 
 # helpers
-def _download_and_load(
-    url: str,
-    suffix: str,
-    loader_cls,
-    verify_ssl: bool = True,
-    **loader_kwargs,
-) -> List[Document]:
+def _download(url: str, suffix: str, verify_ssl: bool = True):
     """
-    Stream `url` to a NamedTemporaryFile (auto‑deleted), then parse it with
-    `loader_cls`.  `suffix` must match the file‑type expected by the loader.
+    Stream `url` to a NamedTemporaryFile (auto‑deleted on close) and return
+    it.  `suffix` must match the file‑type expected by the loader.
     """
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=True) as tmp:
+    tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=True)
+    try:
         r = requests.get(url, timeout=30, stream=True, verify=verify_ssl)
         r.raise_for_status()
         for chunk in r.iter_content(chunk_size=8192):
             tmp.write(chunk)
         tmp.flush()  # ensure bytes on disk
-        return loader_cls(tmp.name, **loader_kwargs).load()
+    except BaseException:
+        tmp.close()
+        raise
+    return tmp
 
 
-def _load_remote_file(
+def _iter_remote_file(
     url: str,
     suffix: str,
     loader_cls,
     **loader_kwargs,
-) -> List[Document]:
+) -> Iterator[Document]:
     """
-    Wrapper around `_download_and_load` that retries without SSL verification
-    when a certificate error is raised (common on internal sites with
-    self‑signed certs).
+    Download `url` and lazily parse it with `loader_cls`; the temporary file
+    lives until the pages have been consumed. Retries without SSL
+    verification when a certificate error is raised (common on internal
+    sites with self‑signed certs).
     """
     try:
-        return _download_and_load(url, suffix, loader_cls, True, **loader_kwargs)
+        tmp = _download(url, suffix, True)
     except requests.exceptions.SSLError:
         logger.warning(
             "SSL verification failed for %s – retrying with verify=False", url
         )
-        return _download_and_load(url, suffix, loader_cls, False, **loader_kwargs)
+        tmp = _download(url, suffix, False)
+    with tmp:
+        yield from loader_cls(tmp.name, **loader_kwargs).lazy_load()
 
 
-def load_docs(path_or_url: str) -> list[Document]:
+def iter_docs(path_or_url: str) -> Iterator[Document]:
     """
-    Auto‑detect and load docs from:
+    Auto‑detect and lazily load docs (one page / row / file at a time) from:
       • PDF (.pdf)                   → PyPDFLoader
       • Markdown (.md / .markdown)   → UnstructuredMarkdownLoader
       • CSV (.csv)                   → CSVLoader   (each row = Document)
@@ -89,50 +118,58 @@ def load_docs(path_or_url: str) -> list[Document]:
     if parsed.scheme in ("http", "https"):
         lower = parsed.path.lower()
         if lower.endswith(".pdf"):
-            return _load_remote_file(path_or_url, ".pdf", PyPDFLoader)
+            return _iter_remote_file(path_or_url, ".pdf", PyPDFLoader)
         if lower.endswith((".md", ".markdown")):
-            return _load_remote_file(path_or_url, ".md", UnstructuredMarkdownLoader)
+            return _iter_remote_file(path_or_url, ".md", UnstructuredMarkdownLoader)
         if lower.endswith(".csv"):
-            return _load_remote_file(path_or_url, ".csv", CSVLoader)
+            return _iter_remote_file(path_or_url, ".csv", CSVLoader)
         if lower.endswith(".docx"):
-            return _load_remote_file(path_or_url, ".docx", UnstructuredWordDocumentLoader)
-        return WebBaseLoader(path_or_url).load()
+            return _iter_remote_file(
+                path_or_url, ".docx", UnstructuredWordDocumentLoader
+            )
+        return WebBaseLoader(path_or_url).lazy_load()
 
     # Local file path
     ext = Path(path_or_url).suffix.lower()
     if ext == ".pdf":
-        return PyPDFLoader(path_or_url).load()
+        return PyPDFLoader(path_or_url).lazy_load()
     if ext in (".md", ".markdown"):
-        return UnstructuredMarkdownLoader(path_or_url).load()
+        return UnstructuredMarkdownLoader(path_or_url).lazy_load()
     if ext == ".csv":
-        return CSVLoader(path_or_url).load()
+        return CSVLoader(path_or_url).lazy_load()
     if ext == ".html":
-        return WebBaseLoader(Path(path_or_url).as_uri()).load()
+        return WebBaseLoader(Path(path_or_url).as_uri()).lazy_load()
     if ext == ".docx":
-        return UnstructuredWordDocumentLoader(path_or_url).load()
+        return UnstructuredWordDocumentLoader(path_or_url).lazy_load()
 
     raise ValueError(f"Unsupported file type: {path_or_url}")
 
 
-def split_docs(docs: list[Document]) -> list[Document]:
+def load_docs(path_or_url: str) -> list[Document]:
+    """All of `iter_docs(path_or_url)` in memory at once."""
+    return list(iter_docs(path_or_url))
+
+
+_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=1000,
+    chunk_overlap=200,
+    separators=["\n\n", "\n", " ", ""],  # default NL separators
+)
+
+
+def split_doc(doc: Document) -> Iterator[Document]:
     """
-    Semantic chunking with heading + page metadata.
+    Semantic chunking of one page with heading + page metadata.
     Uses RecursiveCharacterTextSplitter (natural language, 1000/200).
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", " ", ""],  # default NL separators
-    )
-    chunks: list[Document] = []
-    for doc in docs:
-        for chunk in splitter.split_documents([doc]):
-            heading = chunk.page_content.split("\n", 1)[0].strip()
-            chunk.metadata.update(
-                {"page": doc.metadata.get("page", 0), "heading": heading}
-            )
-            chunks.append(chunk)
-    return chunks
+    for chunk in _SPLITTER.split_documents([doc]):
+        heading = chunk.page_content.split("\n", 1)[0].strip()
+        chunk.metadata.update({"page": doc.metadata.get("page", 0), "heading": heading})
+        yield chunk
+
+
+def split_docs(docs: Iterable[Document]) -> list[Document]:
+    return [chunk for doc in docs for chunk in split_doc(doc)]
 
 
 def _parse_env(env: str) -> tuple[str, str]:
@@ -153,24 +190,33 @@ def _parse_env(env: str) -> tuple[str, str]:
     return cloud, region
 
 
-def _sanitize(name: str) -> str:
+def index_key(name: str) -> str:
+    """
+    Pinecone's spelling of index `name` (lowercase letters, digits and
+    dashes), which also keys its cached client and its manifest records.
+    """
     cleaned = re.sub(r"[^a-z0-9-]+", "-", name.lower())
     return re.sub(r"-{2,}", "-", cleaned).strip("-")
 
 
 def _ensure_index(name: str) -> None:
-    """Create `name` index if it doesn’t exist yet (serverless)."""
-    if name in (idx["name"] for idx in _pc.list_indexes()):
-        return
-
-    cloud, region = _parse_env(PINECONE_ENV)
-    logger.info("Creating Pinecone index %s on %s/%s …", name, cloud, region)
-    _pc.create_index(
-        name=name,
-        dimension=_DIM,
-        metric="cosine",
-        spec=ServerlessSpec(cloud=cloud, region=region),
-    )
+    """Create `name` index if it doesn’t exist yet (serverless); wait until ready."""
+    existing = {idx["name"]: idx for idx in _pc.list_indexes()}
+    if name in existing:
+        if existing[name].get("status", {}).get("ready", True):
+            return
+    else:
+        cloud, region = _parse_env(PINECONE_ENV)
+        # Records of an earlier index by this name describe vectors it no
+        # longer has
+        get_manifest().delete(name)
+        logger.info("Creating Pinecone index %s on %s/%s …", name, cloud, region)
+        _pc.create_index(
+            name=name,
+            dimension=_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(cloud=cloud, region=region),
+        )
 
     try:
         while not _pc.describe_index(name).status["ready"]:
@@ -185,11 +231,80 @@ def _ensure_index(name: str) -> None:
     logger.info("Index %s ready", name)
 
 
-def get_store(name: str) -> PineconeVectorStore:
-    name = _sanitize(name)
-    _ensure_index(name)
-    return PineconeVectorStore(
-        index=_pc.Index(name),
-        embedding=_EMBED,
-        text_key="page_content",
+def _index_lock(name: str) -> threading.Lock:
+    with _INDEXES_LOCK:
+        return _INDEX_LOCKS.setdefault(name, threading.Lock())
+
+
+def get_index(name: str):
+    """
+    Data-plane client of index `name` (created if needed).
+
+    Ready indexes and their clients (with their HTTP connection pools) are
+    cached per process by sanitized name, so only the first call per index
+    talks to the control plane; concurrent first calls wait for one
+    creation instead of each polling.
+    """
+    name = index_key(name)
+    index = _INDEXES.get(name)
+    if index is not None:
+        return index
+    with _index_lock(name):
+        index = _INDEXES.get(name)
+        if index is None:
+            metrics.incr("rag.index_cache.misses")
+            _ensure_index(name)
+            index = _INDEXES[name] = _pc.Index(name)
+    return index
+
+
+def invalidate_index(name: str) -> None:
+    """
+    Forget the cached client and store of `name` and its manifest records,
+    after Pinecone reported the index missing (deleted).
+    """
+    name = index_key(name)
+    _INDEXES.pop(name, None)
+    _STORES.pop(name, None)
+    get_manifest().delete(name)
+
+
+def is_not_found(exc: BaseException) -> bool:
+    """Whether `exc` is Pinecone's 404 (the index no longer exists)."""
+    return (
+        getattr(exc, "status", None) == 404
+        or type(exc).__name__ == "NotFoundException"
+    )
+
+
+def get_writer(name: str) -> VectorWriter:
+    """Embeds and upserts (or deletes) ingestion batches in index `name`."""
+    index = get_index(name)
+    return VectorWriter(
+        embed=_EMBED.embed_documents,
+        upsert=lambda records: index.upsert(vectors=records),
+        text_key=TEXT_KEY,
+        delete=lambda ids: index.delete(ids=ids),
     )
+
+
+def get_manifest():
+    """The indexing manifest (one per process, see INDEX_MANIFEST_BACKEND)."""
+    global _MANIFEST
+    if _MANIFEST is None:
+        _MANIFEST = make_manifest(
+            INDEX_MANIFEST_BACKEND, INDEX_MANIFEST_PATH, REDIS_URI
+        )
+    return _MANIFEST
+
+
+def get_store(name: str) -> PineconeVectorStore:
+    key = index_key(name)
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = PineconeVectorStore(
+            index=get_index(name),
+            embedding=_EMBED,
+            text_key=TEXT_KEY,
+        )
+    return store
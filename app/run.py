@@ -5,9 +5,12 @@ import typer
 import asyncio
 import signal
 import sys
-from langchain_core.messages import HumanMessage
-from app.graph.assistant import GRAPH
+import time
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from app.graph.assistant import build_graph
+from app.graph.memory.loader import load_memories
 from app.mcp import cleanup_mcp
+from app.metrics import metrics, startup
 
 
 app = typer.Typer(help="🗣️  Chat CLI for your personal assistant with long-term memory")
@@ -65,6 +68,92 @@ signal.signal(signal.SIGINT, lambda *_: _shutdown("SIGINT"))
 signal.signal(signal.SIGTERM, lambda *_: _shutdown("SIGTERM"))
 
 
+def _args(args: dict, limit: int = 60) -> str:
+    text = ", ".join(f"{k}={v!r}" for k, v in args.items())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _stream_turn(graph, payload: dict, cfg: dict) -> None:
+    """
+    Run one turn, printing the assistant's tokens as they arrive and the
+    tool calls as progress lines, then the turn's latency breakdown.
+    """
+    t0 = time.perf_counter()
+    first_token = None
+    tools_ms, tools_started, calls = 0.0, None, 0
+    midline = False  # an "AI: …" line is open
+
+    def newline():
+        nonlocal midline
+        if midline:
+            typer.echo()
+            midline = False
+
+    for mode, chunk in graph.stream(
+        payload, cfg, stream_mode=["messages", "custom", "updates"]
+    ):
+        if mode == "messages":
+            msg, meta = chunk
+            # Only the reply: not the summarizer's or the memory extractors' tokens
+            if meta.get("langgraph_node") != "assistant" or not isinstance(
+                msg, AIMessageChunk
+            ):
+                continue
+            if not isinstance(msg.content, str) or not msg.content:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - t0
+            if not midline:
+                typer.secho("AI: ", fg=typer.colors.CYAN, nl=False)
+                midline = True
+            typer.secho(msg.content, fg=typer.colors.CYAN, nl=False)
+
+        elif mode == "custom" and isinstance(chunk, dict):
+            newline()
+            if chunk.get("event") == "tool_start":
+                calls += 1
+                typer.secho(
+                    f"  → {chunk['name']}({_args(chunk.get('args') or {})})",
+                    fg=typer.colors.BRIGHT_BLACK,
+                )
+            elif chunk.get("event") == "tool_progress":
+                typer.secho(
+                    f"  … {chunk['name']}: {chunk['text']}", fg=typer.colors.BRIGHT_BLACK
+                )
+            elif chunk.get("event") == "tool_end":
+                ok = chunk.get("status") != "error"
+                typer.secho(
+                    f"  {'✓' if ok else '✗'} {chunk['name']} {chunk['ms'] / 1000:.2f}s",
+                    fg=typer.colors.BRIGHT_BLACK if ok else typer.colors.RED,
+                )
+
+        elif mode == "updates":
+            now = time.perf_counter()
+            if "tools" in chunk and tools_started is not None:
+                tools_ms += (now - tools_started) * 1000
+                tools_started = None
+            update = chunk.get("assistant") or {}
+            if any(getattr(m, "tool_calls", None) for m in update.get("messages", [])):
+                tools_started = now
+
+    if first_token is None:
+        # Nothing was streamed (e.g. a model without streaming): print the reply
+        ai = graph.get_state(cfg).values["messages"][-1]
+        typer.secho(f"AI: {ai.content}", fg=typer.colors.CYAN)
+    newline()
+
+    total_ms = (time.perf_counter() - t0) * 1000
+    first_ms = first_token * 1000 if first_token is not None else total_ms
+    metrics.observe("turn.first_token_ms", first_ms)
+    metrics.observe("turn.tools_ms", tools_ms)
+    metrics.observe("turn.total_ms", total_ms)
+    typer.secho(
+        f"[first token {first_ms / 1000:.2f}s · tools {tools_ms / 1000:.2f}s "
+        f"({calls} calls) · total {total_ms / 1000:.2f}s]\n",
+        fg=typer.colors.BRIGHT_BLACK,
+    )
+
+
 @app.command()
 def chat(
     user_id: str = typer.Option(
@@ -84,6 +173,7 @@ def chat(
     Start an interactive chat loop.
     Type `/memory` to view stored profile, projects, and instructions.
     Type `/mcp` to list MCP tools.
+    Type `/stats` to show prompt-size, Postgres-pool and other runtime metrics.
     Type `/exit` or Ctrl-D to quit.
     """
     if thread_id is None:
@@ -95,7 +185,9 @@ def chat(
     )
 
     cfg = {"configurable": {"user_id": user_id, "thread_id": thread_id}}
-    store = GRAPH.store
+    graph = build_graph()
+    store = graph.store
+    typer.secho(startup.report() + "\n", fg=typer.colors.BRIGHT_BLACK)
 
     try:
         while True:
@@ -112,49 +204,75 @@ def chat(
 
             # View memory status
             if cmd == "/memory":
+                memories = load_memories(store, user_id)
+
                 # PROFILE
-                entry = store.get(("profile", user_id), "user_profile")
                 typer.secho("=== PROFILE ===", fg=typer.colors.BLUE)
-                typer.echo(entry.value if entry and entry.value else "{}")
+                typer.echo(memories["profile"] or "{}")
 
                 # PROJECTS
-                projs = store.search(("projects", user_id))
                 typer.secho("=== PROJECTS ===", fg=typer.colors.BLUE)
-                for p in projs:
-                    v = p.value
+                for v in memories["projects"]:
                     typer.echo(
                         f"- {v['title']} (status: {v.get('status')}, due: {v.get('due_date')})\n"
                         f"    {v.get('description', '')}"
                     )
 
                 # INSTRUCTIONS
-                insts = store.search(("instructions", user_id))
                 typer.secho("=== INSTRUCTIONS ===", fg=typer.colors.BLUE)
-                for inst in insts:
-                    typer.echo(f"- {inst.value['content']}")
+                for inst in memories["instructions"]:
+                    typer.echo(f"- {inst['content']}")
 
                 typer.secho("=====================\n", fg=typer.colors.BLUE)
                 continue
 
             # View MCP available
             if cmd == "/mcp":
-                from app.mcp import MCP
+                from app.mcp import get_mcp_tools
 
                 typer.secho("=== MCP TOOLS ===", fg=typer.colors.BLUE)
-                for tool in MCP:
+                for tool in get_mcp_tools():
                     typer.echo(f"- {tool.name}: {tool.description}")
                 typer.secho("=====================\n", fg=typer.colors.BLUE)
                 continue
 
-            # Invoke the graph
-            payload = {
-                "messages": [HumanMessage(content=text)],
-                "summary": "",
-            }
-            result = GRAPH.invoke(payload, cfg)
+            # View runtime metrics
+            if cmd == "/stats":
+                snapshot = metrics.snapshot()
+                typer.secho("=== STATS ===", fg=typer.colors.BLUE)
+                for name, s in sorted(snapshot["observations"].items()):
+                    typer.echo(
+                        f"- {name}: n={s['count']} avg={s['avg']:.1f} "
+                        f"p50={s['p50']:.1f} p95={s['p95']:.1f} max={s['max']:.1f}"
+                    )
+                for name, value in sorted(snapshot["counters"].items()):
+                    typer.echo(f"- {name}: {value:g}")
+                for name, value in sorted(snapshot["gauges"].items()):
+                    if isinstance(value, dict):
+                        value = " ".join(f"{k}={v}" for k, v in value.items())
+                    typer.echo(f"- {name}: {value}")
+                billed = snapshot["counters"].get("prompt.input_tokens_total")
+                if billed:
+                    cached = snapshot["counters"].get("prompt.cached_tokens_total", 0)
+                    typer.echo(f"- prompt cache hit rate: {cached / billed:.1%}")
+                counters = snapshot["counters"]
+                for name in sorted(counters):
+                    if name.startswith("llm_cache.") and name.endswith(".hits"):
+                        tier = name.split(".")[1]
+                        hits = counters[name]
+                        total = hits + counters.get(f"llm_cache.{tier}.misses", 0)
+                        typer.echo(f"- LLM cache hit rate ({tier}): {hits / total:.1%}")
+                embedded = counters.get("embed_cache.hits", 0)
+                lookups = embedded + counters.get("embed_cache.misses", 0)
+                if lookups:
+                    typer.echo(f"- embedding cache hit rate: {embedded / lookups:.1%}")
+                typer.secho("=====================\n", fg=typer.colors.BLUE)
+                continue
 
-            ai = result["messages"][-1]
-            typer.secho(f"AI: {ai.content}\n", fg=typer.colors.CYAN)
+            # Run the graph, streaming the reply
+            # (the rolling summary lives in the thread state; don't reset it)
+            payload = {"messages": [HumanMessage(content=text)]}
+            _stream_turn(graph, payload, cfg)
 
     except (EOFError, KeyboardInterrupt):
         _shutdown("Ctrl+D or Ctrl+C")
@@ -10,6 +10,7 @@ from .docs_tools import (
     save_uploaded_file,
 )
 from .finance_tools import get_stock_quote, get_stock_news
+from .output_tools import read_tool_output
 
 TOOLS = [
     tavily_search,
@@ -22,4 +23,5 @@ TOOLS = [
     save_uploaded_file,
     get_stock_quote,
     get_stock_news,
+    read_tool_output,
 ]
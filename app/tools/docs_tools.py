@@ -1,5 +1,6 @@
 # app/tools/docs_tools.py
 
+import asyncio
 import base64
 import logging
 import mimetypes
@@ -18,7 +19,7 @@ from app.config import get_llm
 
 LOGGER = logging.getLogger(__name__)
 
-_LLM = get_llm()
+_LLM = get_llm("summarize")
 _CHUNKER = RecursiveCharacterTextSplitter(chunk_size=1_000, chunk_overlap=200)
 
 
@@ -47,6 +48,33 @@ def _as_local(path_or_url: str) -> str:
     return path_or_url
 
 
+def _summary_prompt(path_or_url: str) -> tuple[str, str | None]:
+    """Build the summarise_file prompt; returns (prompt, error message)."""
+    path = _as_local(path_or_url)
+    ext = pathlib.Path(path).suffix.lower()
+
+    # Lazy imports to keep cold‑start fast
+    if ext == ".pdf":
+        try:
+            from langchain_community.document_loaders import PyPDFLoader  # type: ignore
+        except ImportError:
+            return "", "PyPDFLoader missing – run `pip install langchain-community[pdf]`."
+        text = "\n".join(d.page_content for d in PyPDFLoader(path).load())
+    else:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                text = fh.read()
+        except Exception as exc:
+            return "", f"Cannot read file: {exc}"
+
+    chunks = _CHUNKER.split_text(text)[:3]
+    prompt = (
+        "You are an assistant. Provide a concise summary of the following document for a busy user:\n\n"
+        + "\n\n".join(chunks)
+    )
+    return prompt, None
+
+
 # LangGraph tools
 @tool
 def inspect_file(path_or_url: str, head_chars: int = 500) -> Dict[str, Any]:
@@ -92,29 +120,18 @@ def summarise_file(path_or_url: str, max_tokens: int = 512) -> str:
     1. The document is **not** chunked into Pinecone – this is a one‑off call.
     2. Large files are truncated after the first ≈3×1000‑char segments.
     """
-    path = _as_local(path_or_url)
-    ext = pathlib.Path(path).suffix.lower()
+    prompt, error = _summary_prompt(path_or_url)
+    if error:
+        return error
+    return _LLM.invoke(prompt, max_tokens=max_tokens).content
 
-    # Lazy imports to keep cold‑start fast
-    if ext == ".pdf":
-        try:
-            from langchain_community.document_loaders import PyPDFLoader  # type: ignore
-        except ImportError:
-            return "PyPDFLoader missing – run `pip install langchain-community[pdf]`."
-        text = "\n".join(d.page_content for d in PyPDFLoader(path).load())
-    else:
-        try:
-            with open(path, "r", encoding="utf-8", errors="replace") as fh:
-                text = fh.read()
-        except Exception as exc:
-            return f"Cannot read file: {exc}"
 
-    chunks = _CHUNKER.split_text(text)[:3]
-    prompt = (
-        "You are an assistant. Provide a concise summary of the following document for a busy user:\n\n"
-        + "\n\n".join(chunks)
-    )
-    return _LLM.invoke(prompt, max_tokens=max_tokens).content
+async def _asummarise_file(path_or_url: str, max_tokens: int = 512) -> str:
+    # Download / PDF parsing are blocking; only the LLM call is natively async
+    prompt, error = await asyncio.to_thread(_summary_prompt, path_or_url)
+    if error:
+        return error
+    return (await _LLM.ainvoke(prompt, max_tokens=max_tokens)).content
 
 
 @tool
@@ -209,3 +226,7 @@ def save_uploaded_file(
     except Exception as exc:
         LOGGER.exception("save_uploaded_file failed")
         return {"error": str(exc)}
+
+
+# Native async implementations, used when the graph runs with ainvoke
+summarise_file.coroutine = _asummarise_file
@@ -1,5 +1,6 @@
 # app/tools/finance_tools.py
 
+import asyncio
 import logging
 import json
 import re
@@ -13,7 +14,7 @@ from app.config import get_llm
 
 logger = logging.getLogger(__name__)
 
-_LLM = get_llm()
+_LLM = get_llm("summarize")
 yf_news_tool = YahooFinanceNewsTool()
 
 
@@ -29,6 +30,32 @@ def _normalise_tickers(raw: str | Sequence[str]) -> List[str]:
     return [t.upper() for t in tickers if t]
 
 
+def _news_items(raw: str, max_items: int) -> List[Dict[str, str]]:
+    """Split the Yahoo news tool output into {title, body} items."""
+    if raw.startswith("No news found"):
+        return []
+    items = [b.strip() for b in raw.split("\n\n") if b.strip()][:max_items]
+    news_items: List[Dict[str, str]] = []
+    for blob in items:
+        lines = blob.splitlines()
+        title = lines[0].strip()
+        body = " ".join(lines[1:]).strip()
+        news_items.append({"title": title, "body": body})
+    return news_items
+
+
+def _news_prompt(item: Dict[str, str]) -> str:
+    return (
+        f"Summarise the following market‑news item in ONE sentence:\n\n"
+        f"HEADLINE: {item['title']}\nTEXT: {item['body']}"
+    )
+
+
+def _news_result(tickers: str | Sequence[str], output: List[Dict[str, Any]]) -> str:
+    result = output[0] if isinstance(tickers, str) or len(output) == 1 else output
+    return json.dumps(result, indent=2)
+
+
 # LangGraph tools
 @tool
 def get_stock_quote(tickers: str | Sequence[str]) -> List[Dict[str, Any]]:
@@ -99,28 +126,49 @@ def get_stock_news(
     output: List[Dict[str, Any]] = []
     for t in _normalise_tickers(tickers):
         raw = yf_news_tool.invoke(t) or ""
-        if raw.startswith("No news found"):
-            output.append({"ticker": t, "news": []})
-            continue
-        items = [b.strip() for b in raw.split("\n\n") if b.strip()][:max_items]
-        news_items: List[Dict[str, str]] = []
-        for blob in items:
-            lines = blob.splitlines()
-            title = lines[0].strip()
-            body = " ".join(lines[1:]).strip()
-            item: Dict[str, str] = {"title": title, "body": body}
-            if summarise:
+        news_items = _news_items(raw, max_items)
+        if summarise:
+            for item in news_items:
                 try:
-                    prompt = (
-                        f"Summarise the following market‑news item in ONE sentence:\n\n"
-                        f"HEADLINE: {title}\nTEXT: {body}"
-                    )
-                    summary = _LLM.invoke(prompt, max_tokens=60).content.strip()
-                    item["summary"] = summary
+                    summary = _LLM.invoke(_news_prompt(item), max_tokens=60)
+                    item["summary"] = summary.content.strip()
                 except Exception as exc:
                     logger.warning("LLM summary failed for %s: %s", t, exc)
-            news_items.append(item)
         output.append({"ticker": t, "news": news_items})
     # Return a JSON string
-    result = output[0] if isinstance(tickers, str) or len(output) == 1 else output
-    return json.dumps(result, indent=2)
+    return _news_result(tickers, output)
+
+
+async def _aget_stock_news(
+    tickers: str | Sequence[str],
+    summarise: bool = True,
+    max_items: int = 10,
+) -> str:
+    symbols = _normalise_tickers(tickers)
+
+    # Fetch every ticker concurrently (the Yahoo tool is sync-only)
+    raws = await asyncio.gather(
+        *(asyncio.to_thread(yf_news_tool.invoke, t) for t in symbols)
+    )
+    output = [
+        {"ticker": t, "news": _news_items(raw or "", max_items)}
+        for t, raw in zip(symbols, raws)
+    ]
+
+    # Then summarise every headline of every ticker concurrently
+    if summarise:
+        jobs = [(entry["ticker"], item) for entry in output for item in entry["news"]]
+        replies = await asyncio.gather(
+            *(_LLM.ainvoke(_news_prompt(item), max_tokens=60) for _, item in jobs),
+            return_exceptions=True,
+        )
+        for (t, item), reply in zip(jobs, replies):
+            if isinstance(reply, Exception):
+                logger.warning("LLM summary failed for %s: %s", t, reply)
+            else:
+                item["summary"] = reply.content.strip()
+
+    return _news_result(tickers, output)
+
+
+get_stock_news.coroutine = _aget_stock_news
@@ -0,0 +1,48 @@
+# app/tools/output_tools.py
+
+import asyncio
+import logging
+
+from langchain_core.tools import tool
+
+from app.graph.blob_store import blob_store, handle_digest
+
+logger = logging.getLogger(__name__)
+
+
+@tool
+def read_tool_output(handle: str, offset: int = 0, length: int = 4000) -> str:
+    """
+    Read part of a large tool output that was stored outside the conversation.
+
+    Args:
+      handle: the "blob:sha256:…" handle quoted in the truncated tool result
+      offset: character position to start from (the preview already covers the start)
+      length: how many characters to return (max 4000)
+
+    Returns:
+      The requested slice, prefixed with its position in the full output.
+    """
+    if offset < 0 or length < 0:
+        return "Error: offset and length must not be negative"
+    try:
+        handle_digest(handle)
+    except ValueError as e:
+        return f"Error: {e}"
+    try:
+        text = blob_store.get(handle)
+    except Exception:
+        logger.exception("read_tool_output failed for %r", handle)
+        return f"Error: could not read {handle}"
+    if text is None:
+        return f"Error: {handle} not found (it may have expired)"
+    length = min(length, 4000)
+    end = min(offset + length, len(text))
+    return f"[chars {offset}-{end} of {len(text)}]\n" + text[offset:end]
+
+
+async def _aread_tool_output(handle: str, offset: int = 0, length: int = 4000) -> str:
+    return await asyncio.to_thread(read_tool_output.func, handle, offset, length)
+
+
+read_tool_output.coroutine = _aread_tool_output
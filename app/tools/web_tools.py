@@ -1,6 +1,7 @@
 # app/tools/web_tools.py
 
 import logging
+import threading
 from typing import List, Dict, Any
 
 from langchain_core.tools import tool
@@ -12,16 +13,50 @@ from app.config import TAVILY_API_KEY
 
 logger = logging.getLogger(__name__)
 
-# instantiate once at module load
-_TAVILY = TavilySearchResults(
-    api_key=TAVILY_API_KEY,
-    max_results=5,
-    search_depth="advanced",
-    include_content=True,
-    include_answer=True,
-    include_images=False,
-    include_raw_content=False,
-)
+# One client per max_results value (a field of the tool, not an invoke
+# argument), so concurrent searches never change each other's settings
+_TAVILY: Dict[int, TavilySearchResults] = {}
+_TAVILY_LOCK = threading.Lock()
+
+
+def _tavily(max_results: int) -> TavilySearchResults:
+    max_results = min(max(int(max_results), 1), 5)
+    with _TAVILY_LOCK:
+        if max_results not in _TAVILY:
+            _TAVILY[max_results] = TavilySearchResults(
+                api_key=TAVILY_API_KEY,
+                max_results=max_results,
+                search_depth="advanced",
+                include_content=True,
+                include_answer=True,
+                include_images=False,
+                include_raw_content=False,
+            )
+        return _TAVILY[max_results]
+
+
+def _fetch_urls(url: str, max_pages: int) -> List[str]:
+    # split & limit
+    urls = [u.strip() for u in url.split(",")][:max_pages]
+
+    # auto‑prepend scheme if missing
+    def normalize(u: str) -> str:
+        return u if u.startswith(("http://", "https://")) else "https://" + u
+
+    return [normalize(u) for u in urls]
+
+
+def _pages(docs) -> Dict[str, Any]:
+    pages = []
+    for d in docs:
+        pages.append(
+            {
+                "source": d.metadata.get("source", ""),
+                "title": d.metadata.get("title", ""),
+                "content": d.page_content.strip(),
+            }
+        )
+    return {"pages": pages}
 
 
 @tool
@@ -45,33 +80,38 @@ def web_fetch(url: str, max_pages: int = 1) -> Dict[str, Any]:
       }
     """
     try:
-        # split & limit
-        urls = [u.strip() for u in url.split(",")][:max_pages]
-
-        # auto‑prepend scheme if missing
-        def normalize(u: str) -> str:
-            return u if u.startswith(("http://", "https://")) else "https://" + u
-
-        urls = [normalize(u) for u in urls]
-
-        loader = WebBaseLoader(urls)
-        docs = loader.load()
-        pages = []
-        for d in docs:
-            pages.append(
-                {
-                    "source": d.metadata.get("source", ""),
-                    "title": d.metadata.get("title", ""),
-                    "content": d.page_content.strip(),
-                }
-            )
-        return {"pages": pages}
+        loader = WebBaseLoader(_fetch_urls(url, max_pages))
+        return _pages(loader.load())
+
+    except Exception:
+        logger.exception("web_fetch failed for url=%r", url)
+        return {"pages": []}
+
+
+async def _aweb_fetch(url: str, max_pages: int = 1) -> Dict[str, Any]:
+    try:
+        loader = WebBaseLoader(_fetch_urls(url, max_pages))
+        return _pages([d async for d in loader.alazy_load()])
 
     except Exception:
         logger.exception("web_fetch failed for url=%r", url)
         return {"pages": []}
 
 
+def _hits(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for h in hits:
+        out.append(
+            {
+                "url": h.get("url", ""),
+                "title": h.get("title", ""),
+                "content": h.get("content", "")[:20000],
+                "answer": h.get("answer", "") or "",
+            }
+        )
+    return out
+
+
 @tool
 def tavily_search(query: str, max_results: int = 3) -> List[Dict[str, Any]]:
     """
@@ -85,24 +125,25 @@ def tavily_search(query: str, max_results: int = 3) -> List[Dict[str, Any]]:
         A list of dicts, each with:
           - url     (str)
           - title   (str)
-          - content (str, up to ~20 000 chars)
+          - content (str, up to ~20 000 chars)
           - answer  (str, Tavily’s concise extracted answer)
     """
     try:
-        _TAVILY.max_results = max_results
         # TavilySearchResults.invoke returns a raw List[Dict]
-        hits: List[Dict[str, Any]] = _TAVILY.invoke({"query": query})
-        out = []
-        for h in hits:
-            out.append(
-                {
-                    "url": h.get("url", ""),
-                    "title": h.get("title", ""),
-                    "content": h.get("content", "")[:20000],
-                    "answer": h.get("answer", "") or "",
-                }
-            )
-        return out
+        return _hits(_tavily(max_results).invoke({"query": query}))
     except Exception:
         logger.exception("tavily_search failed for query=%r", query)
         return []
+
+
+async def _atavily_search(query: str, max_results: int = 3) -> List[Dict[str, Any]]:
+    try:
+        return _hits(await _tavily(max_results).ainvoke({"query": query}))
+    except Exception:
+        logger.exception("tavily_search failed for query=%r", query)
+        return []
+
+
+# Native async implementations, used when the graph runs with ainvoke
+web_fetch.coroutine = _aweb_fetch
+tavily_search.coroutine = _atavily_search
@@ -1,6 +1,6 @@
 # app/tools/wiki_search.py
 
-import json, logging
+import asyncio, json, logging
 from typing import List, Dict, Optional
 
 from langchain_core.tools import tool
@@ -10,9 +10,34 @@ from langchain_core.messages import SystemMessage
 from app.config import get_llm
 
 logger = logging.getLogger(__name__)
-_model = get_llm()
+_model = get_llm("summarize")
 
 
+# helpers
+def _entries(docs, trim_content: int) -> List[Dict[str, Optional[str]]]:
+    output: List[Dict[str, Optional[str]]] = []
+    for doc in docs:
+        source = doc.metadata.get("source")
+        title = doc.metadata.get("page") or source
+        text = doc.page_content or ""
+        # Trim to avoid huge payloads
+        if len(text) > trim_content:
+            text = text[:trim_content].rsplit(" ", 1)[0] + "..."
+
+        output.append({"source": source, "page": title, "content": text})
+    return output
+
+
+def _summary_prompt(text: str) -> SystemMessage:
+    return SystemMessage(
+        content=(
+            "You are a concise summarizer. "
+            "Summarize the following Wikipedia page in 2 sentences:\n\n" + text
+        )
+    )
+
+
+# LangGraph tools
 @tool
 def wiki_search(
     query: str,
@@ -49,37 +74,58 @@ def wiki_search(
         )
         return json.dumps([])
 
-    output: List[Dict[str, Optional[str]]] = []
-    for doc in docs:
-        source = doc.metadata.get("source")
-        title = doc.metadata.get("page") or source
-        text = doc.page_content or ""
-        # Trim to avoid huge payloads
-        if len(text) > trim_content:
-            text = text[:trim_content].rsplit(" ", 1)[0] + "..."
-
-        entry: Dict[str, Optional[str]] = {
-            "source": source,
-            "page": title,
-            "content": text,
-        }
+    output = _entries(docs, trim_content)
 
-        # 2) Optional summarization
-        if summarize:
+    # 2) Optional summarization
+    if summarize:
+        for entry in output:
             try:
-                prompt = SystemMessage(
-                    content=(
-                        "You are a concise summarizer. "
-                        "Summarize the following Wikipedia page in 2 sentences:\n\n"
-                        + text
-                    )
-                )
-                summary = _model.invoke([prompt]).content.strip()
-                entry["summary"] = summary
+                summary = _model.invoke([_summary_prompt(entry["content"])])
+                entry["summary"] = summary.content.strip()
             except Exception as e:
                 logger.warning("wiki_search: summarization failed for %r: %s", query, e)
                 entry["summary"] = None
 
-        output.append(entry)
+    return json.dumps(output)
+
+
+async def _awiki_search(
+    query: str,
+    max_pages: int = 2,
+    trim_content: int = 20000,
+    summarize: bool = False,
+) -> str:
+    # WikipediaLoader has no async API; keep it off the event loop
+    try:
+        loader = WikipediaLoader(query=query, load_max_docs=max_pages)
+        docs = await asyncio.to_thread(loader.load)
+    except Exception as e:
+        logger.error(
+            "wiki_search: failed to load pages for query=%r: %s",
+            query,
+            e,
+            exc_info=True,
+        )
+        return json.dumps([])
+
+    output = _entries(docs, trim_content)
+
+    # Summarize every page concurrently
+    if summarize:
+        replies = await asyncio.gather(
+            *(_model.ainvoke([_summary_prompt(e["content"])]) for e in output),
+            return_exceptions=True,
+        )
+        for entry, reply in zip(output, replies):
+            if isinstance(reply, Exception):
+                logger.warning(
+                    "wiki_search: summarization failed for %r: %s", query, reply
+                )
+                entry["summary"] = None
+            else:
+                entry["summary"] = reply.content.strip()
 
     return json.dumps(output)
+
+
+wiki_search.coroutine = _awiki_search
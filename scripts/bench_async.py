@@ -0,0 +1,144 @@
+# scripts/bench_async.py
+"""
+Throughput of the sync vs async graph path against local fakes.
+
+Every turn loads the user's memories through the app's loader (one batched
+store call) and then calls the chat model, like the assistant node does.
+The store and the model are in-memory fakes that only add latency, so the
+numbers isolate how many conversations one worker process can overlap:
+
+  sync  – graph.invoke from a fixed pool of worker threads
+  async – graph.ainvoke, all turns multiplexed on one event loop
+
+    python scripts/bench_async.py --turns 200 --threads 8 --llm-ms 300 --db-ms 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")  # no request is ever sent
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import START, END, MessagesState, StateGraph
+from langgraph.store.memory import InMemoryStore
+
+from app.graph.memory.loader import aload_memories, load_memories
+
+
+class SlowChat(BaseChatModel):
+    latency: float = 0.3
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage("ok"))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+class SlowStore(InMemoryStore):
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def batch(self, ops):
+        time.sleep(self.latency)
+        return super().batch(ops)
+
+    async def abatch(self, ops):
+        await asyncio.sleep(self.latency)
+        return await super().abatch(ops)
+
+
+def build(model: SlowChat, store: SlowStore, async_mode: bool):
+    def assistant(state, config, store):
+        load_memories(store, config["configurable"]["user_id"])
+        return {"messages": [model.invoke(state["messages"])]}
+
+    async def aassistant(state, config, store):
+        await aload_memories(store, config["configurable"]["user_id"])
+        return {"messages": [await model.ainvoke(state["messages"])]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("assistant", aassistant if async_mode else assistant)
+    builder.add_edge(START, "assistant")
+    builder.add_edge("assistant", END)
+    return builder.compile(checkpointer=InMemorySaver(), store=store)
+
+
+def _cfg() -> dict:
+    return {"configurable": {"user_id": "bench", "thread_id": str(uuid.uuid4())}}
+
+
+def _payload() -> dict:
+    return {"messages": [HumanMessage(content="hello")]}
+
+
+def run_sync(graph, turns: int, threads: int) -> list[float]:
+    def turn(_):
+        t0 = time.perf_counter()
+        graph.invoke(_payload(), _cfg())
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(turn, range(turns)))
+
+
+async def run_async(graph, turns: int) -> list[float]:
+    async def turn():
+        t0 = time.perf_counter()
+        await graph.ainvoke(_payload(), _cfg())
+        return time.perf_counter() - t0
+
+    return await asyncio.gather(*(turn() for _ in range(turns)))
+
+
+def report(label: str, latencies: list[float], wall: float) -> None:
+    q = statistics.quantiles(latencies, n=20)
+    print(
+        f"{label:>5}: {len(latencies) / wall:8.1f} turns/s   "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms   "
+        f"p95={q[18] * 1000:7.1f}ms   wall={wall:6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8, help="sync worker threads")
+    parser.add_argument("--llm-ms", type=float, default=300)
+    parser.add_argument("--db-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    model = SlowChat(latency=args.llm_ms / 1000)
+    store = SlowStore(latency=args.db_ms / 1000)
+
+    t0 = time.perf_counter()
+    lat = run_sync(build(model, store, async_mode=False), args.turns, args.threads)
+    report("sync", lat, time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    lat = asyncio.run(run_async(build(model, store, async_mode=True), args.turns))
+    report("async", lat, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
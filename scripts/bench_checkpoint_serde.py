@@ -0,0 +1,185 @@
+# scripts/bench_checkpoint_serde.py
+"""
+Size and speed of checkpoints, uncompressed vs zstd / lz4.
+
+Serializes the channel writes a typical turn produces (the human message,
+an AI message with tool calls, tool results of increasing size, the final
+answer) with the Redis saver's serializer, plain and wrapped in
+`CompressingSerializer`, and reports stored bytes, ratio and the
+dumps / loads time per write. Then stores the checkpoint of a thread after
+each of `--turns` such turns with the stock and the compressed saver and
+reports the bytes per checkpoint key: `MEMORY USAGE` in Redis when
+`--redis-url` points at a Redis Stack server, else the size of the JSON
+document the saver would store. Codecs whose package is missing are skipped.
+
+    python scripts/bench_checkpoint_serde.py --rounds 200 --threshold 1024
+    python scripts/bench_checkpoint_serde.py --redis-url redis://localhost:6379
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")  # no request is ever sent
+
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from langgraph.checkpoint.redis import RedisSaver
+from langgraph.checkpoint.redis.jsonplus_redis import JsonPlusRedisSerializer
+
+from app.graph.checkpoint_serde import (
+    CompressedRedisSaver,
+    CompressingSerializer,
+    compressing,
+)
+
+WORDS = (
+    "the price of bitcoin rose sharply after the report market analysts said "
+    "revenue quarter growth guidance shares fell investors earnings project "
+    "deadline meeting notes summary document page section table results"
+).split()
+
+
+def _text(chars: int, rng: random.Random) -> str:
+    out, n = [], 0
+    while n < chars:
+        word = rng.choice(WORDS)
+        out.append(word)
+        n += len(word) + 1
+    return " ".join(out)[:chars]
+
+
+def sample_writes(seed: int = 0) -> list[tuple[str, object]]:
+    """(label, value) pairs shaped like one turn's pending writes."""
+    rng = random.Random(seed)
+    call = {"name": "web_search", "args": {"query": "bitcoin price"}, "id": "call_1"}
+    writes = [
+        ("human", [HumanMessage(content="What happened to bitcoin today?")]),
+        ("ai+tool_calls", [AIMessage(content="", tool_calls=[call])]),
+    ]
+    for chars in (800, 3000, 6000):
+        result = ToolMessage(
+            content=_text(chars, rng), name="web_search", tool_call_id="call_1"
+        )
+        writes.append((f"tool {chars}c", [result]))
+    writes.append(("answer", [AIMessage(content=_text(1200, rng))]))
+    return writes
+
+
+def _time(fn, rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - t0) / rounds * 1e6
+
+
+def measure(serde, value, rounds: int) -> tuple[int, float, float]:
+    with compressing():
+        typed = serde.dumps_typed(value)
+        dumps_us = _time(lambda: serde.dumps_typed(value), rounds)
+    loads_us = _time(lambda: serde.loads_typed(typed), rounds)
+    return len(typed[1]), dumps_us, loads_us
+
+
+def thread_checkpoints(turns: int):
+    """The thread's checkpoint after each of `turns` turns of `sample_writes`."""
+    messages = []
+    for turn in range(turns):
+        for _, value in sample_writes(seed=turn):
+            for message in value:
+                messages.append(message.model_copy(update={"id": uuid.uuid4().hex}))
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": list(messages), "summary": ""}
+        checkpoint["channel_versions"] = {"messages": turn + 1, "summary": 1}
+        yield create_checkpoint(checkpoint, None, turn)
+
+
+def checkpoint_bytes(saver, checkpoint, step: int, redis_url=None) -> int:
+    """Bytes one checkpoint takes under its key (see the module docstring)."""
+    metadata = {"source": "loop", "step": step, "parents": {}}
+    if redis_url is None:
+        doc = {
+            "checkpoint": saver._dump_checkpoint(checkpoint.copy()),
+            "metadata": saver._dump_metadata(metadata),
+        }
+        return len(orjson.dumps(doc))
+    config = {"configurable": {"thread_id": "bench", "checkpoint_ns": ""}}
+    config = saver.put(config, checkpoint, metadata, {})
+    key = saver._make_redis_checkpoint_key_cached(
+        "bench", "", config["configurable"]["checkpoint_id"]
+    )
+    return saver._redis.memory_usage(key, samples=0)
+
+
+def bench_checkpoints(args, codecs) -> None:
+    import redis
+
+    where = "MEMORY USAGE" if args.redis_url else "JSON document"
+    print(f"\nbytes per checkpoint key ({where}), by turns in the thread")
+    savers = {"none": RedisSaver}
+    savers.update({codec: CompressedRedisSaver for codec in codecs})
+    print(f"{'turns':>6}" + "".join(f" {name:>14}" for name in savers))
+    sizes = {}
+    for name, cls in savers.items():
+        # Without --redis-url the client is never used: documents are only built
+        client = redis.Redis.from_url(args.redis_url) if args.redis_url else object()
+        saver = cls(redis_client=client)
+        if name != "none":
+            saver.serde = CompressingSerializer(
+                saver.serde.inner, name, args.threshold, args.level
+            )
+        if args.redis_url:
+            saver.setup()
+        sizes[name] = [
+            checkpoint_bytes(saver, checkpoint, step, args.redis_url)
+            for step, checkpoint in enumerate(thread_checkpoints(args.turns))
+        ]
+    for turn in range(args.turns):
+        plain = sizes["none"][turn]
+        cells = [f"{s[turn]:8d} {plain / s[turn]:4.1f}x" for s in sizes.values()]
+        print(f"{turn + 1:6d} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--threshold", type=int, default=1024)
+    parser.add_argument("--level", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--redis-url", help="Redis Stack server to measure keys in")
+    args = parser.parse_args()
+
+    base = JsonPlusRedisSerializer()
+    serdes = {"none": base}
+    for codec in ("zstd", "lz4"):
+        serde = CompressingSerializer(base, codec, args.threshold, args.level)
+        if serde._compress is not None:
+            serdes[codec] = serde
+
+    writes = sample_writes()
+    totals = {name: 0 for name in serdes}
+    print(f"{'write':>14} {'codec':>5} {'bytes':>8} {'ratio':>6} {'dumps':>9} {'loads':>9}")
+    for label, value in writes:
+        plain = None
+        for name, serde in serdes.items():
+            size, dumps_us, loads_us = measure(serde, value, args.rounds)
+            plain = plain or size
+            totals[name] += size
+            print(
+                f"{label:>14} {name:>5} {size:8d} {plain / size:6.2f} "
+                f"{dumps_us:7.1f}us {loads_us:7.1f}us"
+            )
+    print()
+    for name, size in totals.items():
+        print(f"turn total {name:>5}: {size:8d} bytes ({totals['none'] / size:.2f}x)")
+
+    bench_checkpoints(args, [name for name in serdes if name != "none"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# scripts/bench_embed_upsert.py
+"""
+Vectors/s of RAG ingestion at different batch and concurrency settings.
+
+Runs the ingestion pipeline (`ingest` + `VectorWriter`) against local
+stand-ins for the embedding API and the vector index that only add latency:
+a fixed round trip per request plus a cost per text / vector. Each row is
+one setting of batch size (texts per embedding request), in-flight batches
+and the per-service caps; the first row is the serial baseline (one batch
+at a time, as `PineconeVectorStore.add_documents` did).
+
+    python scripts/bench_embed_upsert.py --chunks 5000 --embed-ms 250 --upsert-ms 80
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")  # no request is ever sent
+os.environ.setdefault("PINECONE_API_KEY", "pc-bench")
+
+from langchain_core.documents import Document
+
+from app.rag import ingest as pipeline
+
+# (batch size, in-flight batches, embed cap, upsert cap)
+SETTINGS = [
+    (100, 1, 1, 1),
+    (100, 4, 4, 4),
+    (100, 8, 4, 4),
+    (100, 8, 8, 8),
+    (50, 16, 8, 8),
+    (200, 8, 8, 8),
+    (500, 8, 8, 8),
+]
+
+
+class StandIns:
+    """Embedding service and vector index that only add latency."""
+
+    def __init__(self, embed_ms, embed_item_ms, upsert_ms, upsert_item_ms, dim):
+        self.embed_ms, self.embed_item_ms = embed_ms, embed_item_ms
+        self.upsert_ms, self.upsert_item_ms = upsert_ms, upsert_item_ms
+        self.dim = dim
+        self.stored = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        time.sleep((self.embed_ms + self.embed_item_ms * len(texts)) / 1000)
+        return [[0.0] * self.dim for _ in texts]
+
+    def upsert(self, records):
+        time.sleep((self.upsert_ms + self.upsert_item_ms * len(records)) / 1000)
+        with self._lock:
+            self.stored += len(records)
+
+
+def run(args, batch, in_flight, embed_cap, upsert_cap) -> float:
+    pipeline._SLOTS["embed"] = threading.BoundedSemaphore(embed_cap)
+    pipeline._SLOTS["upsert"] = threading.BoundedSemaphore(upsert_cap)
+    services = StandIns(
+        args.embed_ms, args.embed_item_ms, args.upsert_ms, args.upsert_item_ms, args.dim
+    )
+    writer = pipeline.VectorWriter(
+        services.embed, services.upsert, upsert_batch=args.upsert_batch
+    )
+    pages = (Document(page_content=f"chunk {i}") for i in range(args.chunks))
+    stats = pipeline.ingest(
+        pages, lambda doc: [doc], writer, batch_size=batch, max_in_flight=in_flight
+    )
+    assert services.stored == stats.vectors == args.chunks
+    return stats.vectors / stats.seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--embed-ms", type=float, default=250, help="per request")
+    parser.add_argument("--embed-item-ms", type=float, default=0.5, help="per text")
+    parser.add_argument("--upsert-ms", type=float, default=80, help="per request")
+    parser.add_argument("--upsert-item-ms", type=float, default=0.2, help="per vector")
+    parser.add_argument("--upsert-batch", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    print(f"{'batch':>5} {'in-flight':>9} {'embed cap':>9} {'upsert cap':>10} "
+          f"{'vectors/s':>10} {'speedup':>8}")
+    baseline = None
+    for batch, in_flight, embed_cap, upsert_cap in SETTINGS:
+        rate = run(args, batch, in_flight, embed_cap, upsert_cap)
+        baseline = baseline or rate
+        print(f"{batch:5d} {in_flight:9d} {embed_cap:9d} {upsert_cap:10d} "
+              f"{rate:10.0f} {rate / baseline:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# scripts/bench_ingest.py
+"""
+Peak memory and throughput of RAG ingestion, streamed vs materialized.
+
+Feeds synthetic pages of `--page-chars` characters through the ingestion
+pipeline (`app.rag.ingest.ingest`) and through the old load-all → split-all
+→ add-all path, each run in a fresh subprocess so peak RSS isn't shared.
+The vector store is a stand-in that sleeps `--upsert-ms` per batch. The
+streamed peak should stay flat as `--pages` grows; the materialized one
+grows with the document.
+
+    python scripts/bench_ingest.py --pages 500 2000 8000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")  # no request is ever sent
+os.environ.setdefault("PINECONE_API_KEY", "pc-bench")
+
+from langchain_core.documents import Document
+
+WORDS = (
+    "revenue quarter growth guidance shares investors earnings project deadline "
+    "meeting notes summary document page section table results policy handbook"
+).split()
+
+
+def pages(count: int, chars: int, seed: int = 0):
+    rng = random.Random(seed)
+    for page in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(chars // 7))
+        yield Document(page_content=text[:chars], metadata={"page": page})
+
+
+def split(doc: Document, size: int = 1000, overlap: int = 200):
+    """Fixed-size stand-in for the recursive splitter (no extra dependency)."""
+    text = doc.page_content
+    for start in range(0, max(len(text) - overlap, 1), size - overlap):
+        yield Document(page_content=text[start : start + size], metadata=dict(doc.metadata))
+
+
+def run(mode: str, count: int, chars: int, upsert_ms: float) -> dict:
+    from app.rag.ingest import ingest, peak_rss_mb
+
+    def upsert(batch):
+        time.sleep(upsert_ms / 1000)
+        return len(batch)
+
+    t0 = time.perf_counter()
+    if mode == "streamed":
+        stats = ingest(pages(count, chars), split, upsert)
+        chunks = stats.chunks
+    else:
+        docs = list(pages(count, chars))
+        all_chunks = [chunk for doc in docs for chunk in split(doc)]
+        for i in range(0, len(all_chunks), 100):
+            upsert(all_chunks[i : i + 100])
+        chunks = len(all_chunks)
+    seconds = time.perf_counter() - t0
+    return {"chunks": chunks, "seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--page-chars", type=int, default=3000)
+    parser.add_argument("--upsert-ms", type=float, default=2.0)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, count = args.child[0], int(args.child[1])
+        print(json.dumps(run(mode, count, args.page_chars, args.upsert_ms)))
+        return
+
+    print(f"{'pages':>6} {'mode':>12} {'chunks':>7} {'chunks/s':>9} {'peak RSS':>9}")
+    for count in args.pages:
+        for mode in ("materialized", "streamed"):
+            out = subprocess.run(
+                [
+                    sys.executable, __file__, "--child", mode, str(count),
+                    "--page-chars", str(args.page_chars),
+                    "--upsert-ms", str(args.upsert_ms),
+                ],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"{count:6d} {mode:>12} {r['chunks']:7d} "
+                f"{r['chunks'] / r['seconds']:9.0f} {r['peak_rss_mb']:7.0f}MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# tests/conftest.py
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# app.config builds its clients at import; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
@@ -0,0 +1,103 @@
+# tests/test_job_queue.py
+
+import json
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.config import MEMORY_JOB_MAX_ATTEMPTS
+from app.graph.memory import worker
+from app.graph.memory.job_queue import MemoryJobQueue
+
+
+@pytest.fixture
+def queue():
+    q = MemoryJobQueue(name="test:memory_jobs")
+    q._client = fakeredis.FakeRedis()
+    return q
+
+
+def _jobs(queue, key):
+    return [json.loads(raw) for raw in queue.client.lrange(key, 0, -1)]
+
+
+def test_recover_requeues_only_expired_leases(queue):
+    for user in ("alive", "dead", "expired"):
+        queue.enqueue("update_profile", user, "hi")
+    queue.heartbeat("alive", ttl=30)
+    queue.pop("alive")
+    queue.pop("dead")  # never took a lease (crashed before its heartbeat)
+    queue.heartbeat("expired", ttl=0.05)
+    queue.pop("expired")
+    time.sleep(0.1)
+
+    assert queue.recover() == 2
+    assert sorted(job["user_id"] for job in _jobs(queue, queue.name)) == ["dead", "expired"]
+    assert [job["user_id"] for job in _jobs(queue, queue.processing("alive"))] == ["alive"]
+    assert queue.client.llen(queue.processing("dead")) == 0
+
+
+def test_release_lets_others_recover(queue):
+    queue.enqueue("update_profile", "u", "hi")
+    queue.heartbeat("w1", ttl=30)
+    queue.pop("w1")
+    assert queue.recover() == 0
+    queue.release("w1")
+    assert queue.recover() == 1
+    assert queue.depth() == 1
+
+
+def test_ack_removes_the_job(queue):
+    queue.enqueue("update_profile", "u", "hi")
+    raw, _ = queue.pop("w1")
+    queue.ack("w1", raw)
+    assert queue.client.llen(queue.processing("w1")) == 0
+    assert queue.depth() == 0
+
+
+def test_failed_job_is_retried_then_dead_lettered(queue):
+    queue.enqueue("update_profile", "u", "hi")
+    for attempt in range(1, MEMORY_JOB_MAX_ATTEMPTS + 1):
+        raw, job = queue.pop("w1")
+        queue.fail("w1", raw, job)
+        assert queue.client.llen(queue.processing("w1")) == 0
+        if attempt < MEMORY_JOB_MAX_ATTEMPTS:
+            assert [j["attempts"] for j in _jobs(queue, queue.name)] == [attempt]
+    assert queue.depth() == 0
+    assert [j["attempts"] for j in _jobs(queue, queue.dead)] == [MEMORY_JOB_MAX_ATTEMPTS]
+
+
+def test_worker_picks_up_a_dead_workers_jobs(queue, monkeypatch):
+    done = []
+
+    def handler(store, user_id, message):
+        if user_id == "broken":
+            raise RuntimeError("extraction failed")
+        done.append(user_id)
+
+    monkeypatch.setattr(worker, "MEMORY", {"update_profile": handler})
+    queue.enqueue("update_profile", "orphan", "hi")
+    queue.pop("crashed")  # in flight on a worker that died without a lease
+    queue.enqueue("update_profile", "new", "hi")
+    queue.enqueue("update_profile", "broken", "hi")
+
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=worker.run_worker,
+        args=(None, 2),
+        kwargs={"queue": queue, "stop": stop, "lease": 0.3},
+    )
+    thread.start()
+    deadline = time.monotonic() + 10
+    while queue.client.llen(queue.dead) == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    thread.join(5)
+
+    assert sorted(done) == ["new", "orphan"]
+    assert [j["user_id"] for j in _jobs(queue, queue.dead)] == ["broken"]
+    assert queue.depth() == 0
+    assert not queue.client.keys(queue.lease("*"))